@@ -8,10 +8,97 @@ class Settings(BaseSettings):
     # OpenSearch
     opensearch_endpoint: str = "il674y001legt8k99rt0.us-east-1.aoss.amazonaws.com"
     aws_region: str = "us-east-1"
+    opensearch_async_pool_maxsize: int = 256  # Max concurrent connections for the async client
+
+    # Cross-request _msearch batching: searches issued within the window share one request
+    msearch_batch_window_ms: float = 2.0  # 0 disables batching
+    msearch_batch_max_size: int = 64  # Searches per _msearch (a full batch is sent immediately)
+    msearch_batch_timeout_seconds: float = 30.0  # Per-caller wait for its response
 
     # Index names
     companies_index: str = "linkedin-prod-companies"
-    profiles_index: str = "linkedin_profiles_enriched_*"
+    profiles_index: str = "linkedin_profiles_enriched_*"  # Wildcard or comma-separated index list
+
+    # Company set streaming (PIT + search_after over doc values)
+    company_stream_page_size: int = 2000
+    company_pit_keep_alive: str = "1m"
+
+    # People company filter: "name" (current_company_extracted) or
+    # "id" (currentCompanies.company.companyId, names only for id-less companies)
+    people_company_filter_mode: str = "name"
+
+    # Server-side company sets (terms lookup against a side index)
+    company_set_lookup_enabled: bool = False
+    company_sets_index: str = "sequential-company-sets"
+    company_set_ttl_seconds: int = 3600
+
+    # Adaptive company tiers: page 1 starts with the top N companies and widens
+    # only while the page can't be filled (a single value disables widening)
+    company_tiers: str = "200,1000,10000"
+
+    # Query planner: people-first when the people criteria alone match at most
+    # this many people (and fewer people than companies match)
+    planner_enabled: bool = True
+    planner_people_first_max: int = 2000
+    planner_cache_ttl_seconds: int = 900
+
+    # Company-result cache (name set per normalized company criteria)
+    company_cache_max_bytes: int = 128 * 1024 * 1024  # 0 disables the cache
+    company_cache_ttl_seconds: int = 900
+
+    # Profile index routing (publicId → index)
+    profile_router_max_entries: int = 1000000
+    profile_routing_snapshot: str = ""  # Optional NDJSON/TSV snapshot loaded at startup
+
+    # In-process profile cache (full documents, LRU + TTL)
+    profile_cache_max_bytes: int = 64 * 1024 * 1024  # 0 disables the cache
+    profile_cache_ttl_seconds: int = 300
+    profile_negative_cache_max_bytes: int = 4 * 1024 * 1024
+    profile_negative_cache_ttl_seconds: int = 60
+
+    # Persistent profile cache (SQLite file, survives restarts) - empty path disables it
+    profile_disk_cache_path: str = ""
+    profile_disk_cache_max_bytes: int = 512 * 1024 * 1024
+    profile_disk_cache_ttl_seconds: int = 86400
+
+    # Batch profile lookups
+    profile_batch_max_ids: int = 50000  # Max publicIds per /v1/profiles/batch request
+    profile_batch_chunk_size: int = 500  # publicIds per _msearch chunk
+    profile_batch_concurrency: int = 4  # Chunks in flight per request
+
+    # Sequential search response cache (serialized pages + ETag, 304 on If-None-Match)
+    response_cache_max_bytes: int = 64 * 1024 * 1024  # 0 disables the cache
+    response_cache_ttl_seconds: int = 60  # Keep well below session_ttl_seconds (cached pages carry session tokens)
+
+    # Single-flight: concurrent identical sequential searches / profile lookups share one execution
+    request_coalescing_enabled: bool = True
+
+    # Batch sequential search (/v1/search/sequential/batch)
+    sequential_batch_max_searches: int = 1000  # Max searches per request
+    sequential_batch_concurrency: int = 16  # Searches in flight per request
+
+    # Search sessions: "memory" (per-worker LRU), "redis" (shared) or
+    # "token" (stateless - session state signed into the token itself)
+    session_store: str = "memory"
+    session_redis_url: str = "redis://localhost:6379/0"
+    session_store_max_bytes: int = 256 * 1024 * 1024  # In-memory store budget
+    session_ttl_seconds: int = 3600
+    session_token_secret: str = "your-secret-key-change-in-production-use-env-var"
+    session_token_version: int = 2  # Stateless token format: 1 (JSON) or 2 (compact binary)
+
+    # People pagination over a point in time (opened on page 1, kept in the session)
+    people_pit_enabled: bool = True
+    people_pit_keep_alive: str = "5m"  # Renewed by every page request
+    people_pit_retry_seconds: int = 300  # After a failed open (e.g. PIT unsupported), page without one this long
+
+    # Deep paging: search_after checkpoints recorded in the session every N pages
+    max_page: int = 1000
+    session_checkpoint_interval: int = 10
+    session_walk_max_hits: int = 10000  # Sort values fetched per walk request
+    session_prefetch_pages: int = 50  # Background checkpoint horizon ahead of the user (0 disables)
+
+    # Audience sizing (/v1/search/count)
+    count_approximate_threshold: int = 10000  # Approximate mode stops counting here
 
     # Query limits
     max_companies_filter: int = 1000
@@ -3,23 +3,57 @@ LinkedIn Sequential Search API
 FastAPI application for company → people sequential queries
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from mangum import Mangum
+from contextlib import asynccontextmanager
+import json
 import time
-
-from app.models.request import SequentialSearchRequest
-from app.models.response import SequentialSearchResponse
-from app.models.profile_response import ProfileResponse, BatchProfileRequest, BatchProfileResponse
+from typing import Optional
+
+from app.models.request import SequentialSearchRequest, SequentialBatchRequest, SequentialCountRequest
+from app.models.response import SequentialSearchResponse, SequentialCountResponse
+from app.models.profile_response import (
+    ProfileResponse,
+    BatchProfileRequest,
+    BatchProfileResponse,
+    BatchNameSearchRequest
+)
 from app.services import sequential_service_optimized as sequential_service
 from app.services import profile_service
+from app.services import company_service
+from app.services import query_planner
+from app.services.opensearch_client import opensearch_client
+from app.services.profile_router import profile_router
+from app.services.session_store import session_store
+from app.services.response_cache import search_response_cache, response_etag, etag_matches
 from app.config import settings
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown hooks"""
+    # Preload publicId → index routes
+    if settings.profile_routing_snapshot:
+        loaded = profile_router.load_snapshot(settings.profile_routing_snapshot)
+        print(f"Loaded {loaded:,} profile routes from {settings.profile_routing_snapshot}")
+
+    yield
+    # Release the async client's connection pool
+    await opensearch_client.close_async()
+
+    if profile_service.profile_disk_store is not None:
+        profile_service.profile_disk_store.close()
+
+    if session_store is not None:
+        await session_store.close()
+
 # Initialize FastAPI
 app = FastAPI(
     title=settings.api_title,
     version=settings.api_version,
-    description="Sequential search API: Query companies first, then find people at those companies"
+    description="Sequential search API: Query companies first, then find people at those companies",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -29,6 +63,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],  # Lets browser clients revalidate with If-None-Match
 )
 
 @app.get("/")
@@ -40,10 +75,15 @@ async def root():
         "status": "active",
         "endpoints": {
             "sequential_search": "/v1/search/sequential",
+            "sequential_search_batch": "/v1/search/sequential/batch",
+            "sequential_count": "/v1/search/count",
             "profile_by_id": "/v1/profiles/{publicId}",
             "profiles_batch": "/v1/profiles/batch",
+            "profiles_batch_stream": "/v1/profiles/batch/stream",
             "search_by_name": "/v1/profiles/search/by-name/{fullName}",
+            "search_by_name_batch": "/v1/profiles/search/by-name",
             "health": "/health",
+            "metrics": "/v1/metrics",
             "docs": "/docs"
         }
     }
@@ -53,8 +93,7 @@ async def health_check():
     """Health check endpoint"""
     try:
         # Test OpenSearch connection
-        from app.services.opensearch_client import opensearch_client
-        opensearch_client.client.ping()
+        await opensearch_client.async_client.ping()
         opensearch_status = "connected"
     except:
         opensearch_status = "disconnected"
@@ -65,8 +104,27 @@ async def health_check():
         "timestamp": time.time()
     }
 
+@app.get("/v1/metrics")
+async def metrics():
+    """In-process cache and routing counters for this worker"""
+    return {
+        "profile_cache": profile_service.profile_cache.stats(),
+        "profile_negative_cache": profile_service.profile_negative_cache.stats(),
+        "profile_disk_cache": profile_service.profile_disk_store.stats() if profile_service.profile_disk_store else None,
+        "profile_router": profile_router.stats(),
+        "company_cache": company_service.company_result_cache.stats(),
+        "company_cache_fill": company_service.company_fill_flight.stats(),
+        "sequential_search_flight": sequential_service.search_flight.stats(),
+        "profile_flight": profile_service.profile_flight.stats(),
+        "planner_cache": query_planner.plan_cache.stats(),
+        "search_response_cache": search_response_cache.stats(),
+        "session_store": session_store.stats() if session_store else None,
+        "msearch_batcher": opensearch_client.batcher_stats(),
+        "timestamp": time.time()
+    }
+
 @app.post("/v1/search/sequential", response_model=SequentialSearchResponse)
-async def sequential_search(request: SequentialSearchRequest):
+async def sequential_search(request: SequentialSearchRequest, if_none_match: Optional[str] = Header(None)):
     """
     Sequential Company → People Search
 
@@ -105,18 +163,23 @@ async def sequential_search(request: SequentialSearchRequest):
       }
     }
     """
+    arguments = _search_arguments(request)
+    cache_key = sequential_service.search_request_key(arguments)
+
+    # Cached page: answered without OpenSearch or enrichment (304 if the client has it)
+    cached = search_response_cache.get(cache_key)
+    if cached is not None:
+        etag, body = cached
+        return _page_response(body, etag, if_none_match)
+
     try:
         # Execute sequential search with production features
-        results = await sequential_service.execute_sequential_search(
-            company_criteria=request.company_criteria.model_dump(exclude_none=True),
-            people_criteria=request.people_criteria.model_dump(exclude_none=True),
-            page=request.page,
-            page_size=request.page_size,
-            session_token=request.session_token,
-            cursor=request.cursor
-        )
+        results = await sequential_service.execute_sequential_search(**arguments)
 
-        return results  # Already matches SequentialSearchResponse structure
+        if results.get('status') != 'success':
+            return results  # Errors are neither cached nor tagged
+
+        body = SequentialSearchResponse.model_validate(results).model_dump_json().encode()
 
     except Exception as e:
         raise HTTPException(
@@ -124,13 +187,100 @@ async def sequential_search(request: SequentialSearchRequest):
             detail=f"Search error: {str(e)}"
         )
 
-# AWS Lambda handler
-handler = Mangum(app)
+    # A fresh execution is never a 304: its body (and session) is new to every client
+    etag = response_etag(body)
+    search_response_cache.set(cache_key, (etag, body))
+    return _page_response(body, etag, None)
 
-if __name__ == "__main__":
-    # For local testing
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+def _page_response(body: bytes, etag: str, if_none_match: Optional[str]) -> Response:
+    """Serialized page with its ETag, or 304 Not Modified if the client already holds it"""
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+@app.post("/v1/search/sequential/batch")
+async def sequential_search_batch(request: SequentialBatchRequest):
+    """
+    Batch sequential search (NDJSON)
+
+    Runs every search of the batch and streams one JSON line per search, in
+    completion order: the /v1/search/sequential response plus its "index" in
+    the request. A failed search is reported on its own line
+    ({"index": 3, "status": "error", ...}); the rest of the batch continues.
+
+    Searches sharing company criteria resolve the company set once, and
+    concurrent people queries are sent together as _msearch requests.
+    Up to SEQUENTIAL_BATCH_CONCURRENCY searches run at a time.
+
+    **Use Cases:**
+    - Nightly jobs running thousands of criteria pairs
+    """
+    searches = [_search_arguments(search) for search in request.searches]
+
+    async def ndjson_lines():
+        try:
+            async for index, response in sequential_service.iter_sequential_batch(
+                searches,
+                settings.sequential_batch_concurrency
+            ):
+                yield json.dumps({"index": index, **response}) + "\n"
+
+        except Exception as e:
+            # Headers are already sent - report the failure in-band
+            yield json.dumps({"error": f"Batch search error: {str(e)}"}) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+def _search_arguments(request: SequentialSearchRequest) -> dict:
+    """execute_sequential_search keyword arguments for a validated request"""
+    return {
+        'company_criteria': request.company_criteria.model_dump(exclude_none=True),
+        'people_criteria': request.people_criteria.model_dump(exclude_none=True),
+        'page': request.page,
+        'page_size': request.page_size,
+        'session_token': request.session_token,
+        'cursor': request.cursor,
+        'facets': request.facets,
+        'facet_size': request.facet_size,
+        'facets_only': request.facets_only,
+        'exact_total': request.exact_total
+    }
+
+@app.post("/v1/search/count", response_model=SequentialCountResponse)
+async def sequential_count(request: SequentialCountRequest):
+    """
+    Audience sizing: count people matching company → people criteria
+
+    Runs the same company stage (cached) and people query as
+    /v1/search/sequential with size 0 - no profiles, enrichment or session.
+
+    **Modes:**
+    - exact: full count
+    - approximate: counting stops at COUNT_APPROXIMATE_THRESHOLD
+      (profiles_relation "gte"); with company_sample, people are counted at a
+      random sample of the matched companies and scaled up
+      (profiles_relation "approx")
+
+    Example Request:
+    {
+      "company_criteria": {"industry": ["Technology"]},
+      "people_criteria": {"seniority": ["senior"]},
+      "mode": "approximate"
+    }
+    """
+    try:
+        return await sequential_service.execute_sequential_count(
+            company_criteria=request.company_criteria.model_dump(exclude_none=True),
+            people_criteria=request.people_criteria.model_dump(exclude_none=True),
+            mode=request.mode,
+            company_sample=request.company_sample
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Count error: {str(e)}"
+        )
 
 # ============================================================
 # Individual Profile Lookup Endpoints
@@ -166,7 +316,7 @@ async def get_profile(public_id: str, include_fields: str = None):
         fields_list = [f.strip() for f in include_fields.split(',')]
 
     try:
-        profile = profile_service.get_profile_by_id(public_id, include_fields=fields_list)
+        profile = await profile_service.get_profile_by_id(public_id, include_fields=fields_list)
 
         if profile:
             return profile
@@ -193,7 +343,8 @@ async def get_profiles_batch(request: BatchProfileRequest):
     ```
 
     **Limits:**
-    - Max 100 profiles per request
+    - Max 50,000 profiles per request (fetched internally in _msearch chunks)
+    - Profiles are returned in request order, duplicates removed
     - Profiles not found are listed in "not_found" array
 
     **Returns:**
@@ -215,14 +366,14 @@ async def get_profiles_batch(request: BatchProfileRequest):
     - Build contact lists with full details
     """
     try:
-        profiles = profile_service.get_profiles_batch(
+        profiles = await profile_service.get_profiles_batch(
             public_ids=request.public_ids,
             include_fields=request.include_fields
         )
 
         # Find which IDs weren't found
         found_ids = {p['publicId'] for p in profiles}
-        not_found = [pid for pid in request.public_ids if pid not in found_ids]
+        not_found = [pid for pid in dict.fromkeys(request.public_ids) if pid not in found_ids]
 
         return {
             "profiles": profiles,
@@ -235,6 +386,35 @@ async def get_profiles_batch(request: BatchProfileRequest):
         raise HTTPException(status_code=500, detail=f"Batch fetch error: {str(e)}")
 
 
+@app.post("/v1/profiles/batch/stream")
+async def get_profiles_batch_stream(request: BatchProfileRequest):
+    """
+    Streaming batch profile lookup (NDJSON)
+
+    Same request as /v1/profiles/batch, but profiles are streamed back one
+    JSON object per line, in request order, as each chunk of ids resolves.
+    Ids that weren't found are emitted as {"publicId": "...", "not_found": true}.
+
+    **Use Cases:**
+    - Enrichment jobs with tens of thousands of ids
+    - Start processing results before the whole batch is fetched
+    """
+    async def ndjson_lines():
+        try:
+            async for public_id, profile in profile_service.iter_profiles_batch(
+                request.public_ids,
+                include_fields=request.include_fields
+            ):
+                line = profile if profile else {"publicId": public_id, "not_found": True}
+                yield json.dumps(line) + "\n"
+
+        except Exception as e:
+            # Headers are already sent - report the failure in-band
+            yield json.dumps({"error": f"Batch fetch error: {str(e)}"}) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
 @app.get("/v1/profiles/search/by-name/{full_name}")
 async def search_by_name(full_name: str, limit: int = 10):
     """
@@ -252,7 +432,8 @@ async def search_by_name(full_name: str, limit: int = 10):
     GET /v1/profiles/search/by-name/John%20Smith?limit=20
     ```
 
-    **Returns:** List of profiles with matching names
+    **Returns:** List of profiles with matching names, best match first
+    (merged by relevance across all profile indices)
 
     **Use Case:**
     - When multiple people have the same name
@@ -261,7 +442,7 @@ async def search_by_name(full_name: str, limit: int = 10):
     """
     try:
         limit = min(limit, 50)  # Cap at 50
-        profiles = profile_service.search_profiles_by_name_exact(full_name, limit=limit)
+        profiles = await profile_service.search_profiles_by_name_exact(full_name, limit=limit)
 
         return {
             "query": full_name,
@@ -272,3 +453,53 @@ async def search_by_name(full_name: str, limit: int = 10):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Name search error: {str(e)}")
 
+
+
+@app.post("/v1/profiles/search/by-name")
+async def search_by_name_batch(request: BatchNameSearchRequest):
+    """
+    Search profiles for many names at once (batch name disambiguation)
+
+    **Request:**
+    ```json
+    {
+      "names": ["John Smith", "Jane Doe"],
+      "limit": 10
+    }
+    ```
+
+    **Returns:** One entry per name, in request order:
+    ```json
+    {
+      "results": [
+        {"query": "John Smith", "results": [...], "total_found": 10},
+        {"query": "Jane Doe", "results": [...], "total_found": 4}
+      ]
+    }
+    ```
+    """
+    try:
+        matches = await profile_service.search_profiles_by_names_batch(request.names, limit=request.limit)
+
+        return {
+            "results": [
+                {
+                    "query": name,
+                    "results": matches.get(name, []),
+                    "total_found": len(matches.get(name, []))
+                }
+                for name in request.names
+            ]
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Name search error: {str(e)}")
+
+
+# AWS Lambda handler
+handler = Mangum(app)
+
+if __name__ == "__main__":
+    # For local testing
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -4,6 +4,7 @@ Response models for individual profile lookup
 
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
+from app.config import settings
 
 
 class ProfileResponse(BaseModel):
@@ -80,7 +81,11 @@ class BatchProfileRequest(BaseModel):
       "include_fields": ["publicId", "fullName", "headline"]
     }
     """
-    public_ids: List[str] = Field(..., max_length=100, description="List of LinkedIn publicIds (max 100)")
+    public_ids: List[str] = Field(
+        ...,
+        max_length=settings.profile_batch_max_ids,
+        description=f"List of LinkedIn publicIds (max {settings.profile_batch_max_ids:,})"
+    )
     include_fields: Optional[List[str]] = Field(None, description="Fields to include (None = all fields)")
 
 
@@ -100,3 +105,17 @@ class BatchProfileResponse(BaseModel):
     total_found: int
     total_requested: int
     not_found: List[str] = Field(default_factory=list, description="publicIds that weren't found")
+
+
+class BatchNameSearchRequest(BaseModel):
+    """
+    Batch name disambiguation request
+
+    Example:
+    {
+      "names": ["John Smith", "Jane Doe"],
+      "limit": 10
+    }
+    """
+    names: List[str] = Field(..., max_length=100, description="Full names to search (max 100)")
+    limit: int = Field(10, ge=1, le=50, description="Max results per name (max 50)")
@@ -2,7 +2,8 @@
 Request models for Sequential Search API
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Literal
+from app.config import settings
 
 class CompanyCriteria(BaseModel):
     """Company filter criteria"""
@@ -80,7 +81,8 @@ class SequentialSearchRequest(BaseModel):
 
     Production Features:
     - Session tokens for consistent pagination
-    - Cursor-based deep pagination (pages >20)
+    - Random-access deep pagination (any page up to settings.max_page, via
+      session checkpoints; cursors are still accepted)
     - Configurable page size (10-50)
 
     Example:
@@ -105,7 +107,7 @@ class SequentialSearchRequest(BaseModel):
     people_criteria: PeopleCriteria
 
     # Pagination
-    page: int = Field(1, ge=1, le=20, description="Page number (1-20 for offset-based)")
+    page: int = Field(1, ge=1, le=settings.max_page, description="Page number (1-max_page; deep pages start from session checkpoints)")
     page_size: int = Field(25, ge=10, le=50, description="Results per page (10-50)")
 
     # Consistency & Performance
@@ -113,3 +115,59 @@ class SequentialSearchRequest(BaseModel):
 
     # Deep pagination (pages >20)
     cursor: Optional[str] = Field(None, description="Cursor for pages >20 (from previous response)")
+
+    # Facets (counts over all matched people, same round trip)
+    facets: Optional[List[Literal["seniority", "location_country", "industry", "years_of_experience"]]] = Field(
+        None, description="Facet counts to return with the page"
+    )
+    facet_size: int = Field(10, ge=1, le=100, description="Buckets per facet")
+    facets_only: bool = Field(False, description="Return facets and totals only (no profiles)")
+
+    # Company tiers
+    exact_total: bool = Field(
+        False,
+        description="Search all matched companies (up to the largest tier) so total_results is exact"
+    )
+
+class SequentialBatchRequest(BaseModel):
+    """
+    Batch of sequential searches, answered as an NDJSON stream
+
+    Example:
+    {
+      "searches": [
+        {"company_criteria": {"industry": ["Technology"]}, "people_criteria": {"seniority": ["senior"]}},
+        {"company_criteria": {"industry": ["Technology"]}, "people_criteria": {"job_title": ["Engineer"]}}
+      ]
+    }
+    """
+    searches: List[SequentialSearchRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.sequential_batch_max_searches,
+        description=f"Sequential search requests (max {settings.sequential_batch_max_searches:,})"
+    )
+
+class SequentialCountRequest(BaseModel):
+    """
+    Audience sizing request: how many people match, without fetching profiles
+
+    Example:
+    {
+      "company_criteria": {"industry": ["Technology"]},
+      "people_criteria": {"seniority": ["senior"]},
+      "mode": "approximate",
+      "company_sample": 500
+    }
+    """
+    company_criteria: CompanyCriteria
+    people_criteria: PeopleCriteria
+
+    mode: Literal["exact", "approximate"] = Field(
+        "exact",
+        description="exact: full count; approximate: counting stops at COUNT_APPROXIMATE_THRESHOLD"
+    )
+    company_sample: Optional[int] = Field(
+        None, ge=10, le=10000,
+        description="Approximate mode only: count at a random sample of this many matched companies and scale up"
+    )
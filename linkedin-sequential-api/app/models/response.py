@@ -22,8 +22,11 @@ class QueryMetadata(BaseModel):
     company_filter_applied: int  # Actual unique companies in filter
     profiles_matched: int
     query_time_ms: int
-    search_mode: str  # "sequential" or "direct"
+    search_mode: str  # "sequential" (company-first), "people_first" or "direct" (+ "_cached" on later pages)
     suggestion: Optional[str] = None  # Refinement suggestions
+    total_relation: str = "eq"  # "gte": only the top company_tier companies were searched
+    company_tier: Optional[int] = None  # Company-set size the session is pinned to
+    plan: Optional[Dict[str, Any]] = None  # Planner choice on page 1: strategy, reason, estimates
 
 class SequentialSearchResponse(BaseModel):
     """
@@ -39,3 +42,15 @@ class SequentialSearchResponse(BaseModel):
     results: List[Dict[str, Any]]
     pagination: PaginationInfo
     metadata: QueryMetadata
+    facets: Optional[Dict[str, List[Dict[str, Any]]]] = None  # {facet: [{value, count}]}
+
+class SequentialCountResponse(BaseModel):
+    """Audience sizing result (no profiles)"""
+    status: str = "success"
+    profiles_matched: int
+    profiles_relation: str  # "eq" exact, "gte" lower bound, "approx" extrapolated from a company sample
+    companies_matched: int
+    companies_used: int
+    mode: str  # "exact" or "approximate"
+    search_mode: str  # "sequential" or "direct"
+    query_time_ms: int
@@ -8,6 +8,77 @@ from typing import List, Dict, Any, Tuple
 from app.services.opensearch_client import opensearch_client
 
 
+def _id_lookup_query(company_ids: List[int]) -> Dict[str, Any]:
+    """Query companies by memberId"""
+    return {
+        "query": {"terms": {"memberId": company_ids}},
+        "size": len(company_ids),
+        "_source": ["memberId", "domain", "industry"]
+    }
+
+
+def _name_lookup_query(company_names: List[str]) -> Dict[str, Any]:
+    """Query companies by exact name (fallback for unmatched IDs)"""
+    # Simple name matching - use terms query to avoid clause explosion
+    return {
+        "query": {
+            "terms": {
+                "name.keyword": company_names[:100]  # Exact match only, simple
+            }
+        },
+        "size": len(company_names),
+        "_source": ["name", "memberId", "domain", "industry"]
+    }
+
+
+def _collect_id_matches(
+    id_results: Dict[str, Any],
+    company_ids_to_names: Dict[int, str],
+    result_map: Dict[int, Dict[str, Any]]
+) -> set:
+    """Store ID matches in result_map and return the matched IDs"""
+    matched_ids = set()
+
+    for hit in id_results['hits']['hits']:
+        company = hit['_source']
+        member_id = company.get('memberId')
+
+        if member_id and member_id in company_ids_to_names:
+            result_map[member_id] = {
+                'domain': company.get('domain') if company.get('domain') else None,
+                'industry': company.get('industry') if company.get('industry') else None
+            }
+            matched_ids.add(member_id)
+
+    return matched_ids
+
+
+def _collect_name_matches(
+    name_results: Dict[str, Any],
+    unmatched_ids: set,
+    company_ids_to_names: Dict[int, str],
+    result_map: Dict[int, Dict[str, Any]]
+):
+    """Map name matches back to the original IDs in result_map"""
+    name_to_data = {}
+    for hit in name_results['hits']['hits']:
+        company = hit['_source']
+        name = company.get('name', '').strip()
+
+        if name and name not in name_to_data:  # Take first (best) match
+            name_to_data[name] = {
+                'domain': company.get('domain') if company.get('domain') else None,
+                'industry': company.get('industry') if company.get('industry') else None
+            }
+
+    # Map back to IDs
+    for cid in unmatched_ids:
+        if cid in company_ids_to_names:
+            name = company_ids_to_names[cid]
+            if name in name_to_data:
+                result_map[cid] = name_to_data[name]
+
+
 def get_companies_hybrid(
     company_ids_to_names: Dict[int, str]
 ) -> Dict[int, Dict[str, Any]]:
@@ -30,76 +101,73 @@ def get_companies_hybrid(
     company_ids = list(company_ids_to_names.keys())
 
     try:
-        query_by_id = {
-            "query": {"terms": {"memberId": company_ids}},
-            "size": len(company_ids),
-            "_source": ["memberId", "domain", "industry"]
-        }
-
         id_results = opensearch_client.client.search(
             index="linkedin-prod-companies",
-            body=query_by_id
+            body=_id_lookup_query(company_ids)
         )
+        matched_ids = _collect_id_matches(id_results, company_ids_to_names, result_map)
 
-        # Store ID matches
+    except Exception as e:
+        print(f"Error in ID matching: {e}")
         matched_ids = set()
 
-        for hit in id_results['hits']['hits']:
-            company = hit['_source']
-            member_id = company.get('memberId')
+    # STEP 2: For unmatched IDs, try name matching (fallback)
+    unmatched_ids = set(company_ids) - matched_ids
+
+    if unmatched_ids:
+        unmatched_names = [company_ids_to_names[cid] for cid in unmatched_ids if cid in company_ids_to_names]
+
+        try:
+            name_results = opensearch_client.client.search(
+                index="linkedin-prod-companies",
+                body=_name_lookup_query(unmatched_names)
+            )
+            _collect_name_matches(name_results, unmatched_ids, company_ids_to_names, result_map)
+
+        except Exception as e:
+            print(f"Error in name matching: {e}")
+
+    return result_map
+
+
+async def get_companies_hybrid_async(
+    company_ids_to_names: Dict[int, str]
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Non-blocking variant of get_companies_hybrid (uses the async OpenSearch client)
+
+    Returns:
+        Map of {companyId: {"domain": "...", "industry": "..."}}
+    """
+
+    if not company_ids_to_names:
+        return {}
+
+    result_map = {}
+    company_ids = list(company_ids_to_names.keys())
 
-            if member_id and member_id in company_ids_to_names:
-                result_map[member_id] = {
-                    'domain': company.get('domain') if company.get('domain') else None,
-                    'industry': company.get('industry') if company.get('industry') else None
-                }
-                matched_ids.add(member_id)
+    try:
+        id_results = await opensearch_client.search(
+            index="linkedin-prod-companies",
+            body=_id_lookup_query(company_ids)
+        )
+        matched_ids = _collect_id_matches(id_results, company_ids_to_names, result_map)
 
     except Exception as e:
         print(f"Error in ID matching: {e}")
         matched_ids = set()
 
-    # STEP 2: For unmatched IDs, try name matching (fallback)
     unmatched_ids = set(company_ids) - matched_ids
 
     if unmatched_ids:
         unmatched_names = [company_ids_to_names[cid] for cid in unmatched_ids if cid in company_ids_to_names]
 
         try:
-            # Simple name matching - use terms query to avoid clause explosion
-            query_by_name = {
-                "query": {
-                    "terms": {
-                        "name.keyword": unmatched_names[:100]  # Exact match only, simple
-                    }
-                },
-                "size": len(unmatched_names),
-                "_source": ["name", "memberId", "domain", "industry"]
-            }
-
-            name_results = opensearch_client.client.search(
+            name_results = await opensearch_client.search(
                 index="linkedin-prod-companies",
-                body=query_by_name
+                body=_name_lookup_query(unmatched_names)
             )
-
-            # Map results back to original IDs by name
-            name_to_data = {}
-            for hit in name_results['hits']['hits']:
-                company = hit['_source']
-                name = company.get('name', '').strip()
-
-                if name and name not in name_to_data:  # Take first (best) match
-                    name_to_data[name] = {
-                        'domain': company.get('domain') if company.get('domain') else None,
-                        'industry': company.get('industry') if company.get('industry') else None
-                    }
-
-            # Map back to IDs
-            for cid in unmatched_ids:
-                if cid in company_ids_to_names:
-                    name = company_ids_to_names[cid]
-                    if name in name_to_data:
-                        result_map[cid] = name_to_data[name]
+            _collect_name_matches(name_results, unmatched_ids, company_ids_to_names, result_map)
 
         except Exception as e:
             print(f"Error in name matching: {e}")
@@ -133,15 +201,8 @@ def extract_company_id(company_obj: Dict) -> Tuple[int, str]:
     return (comp_id, comp_name)
 
 
-def enrich_profile_companies(profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """
-    Enrich companies AND education with domain + industry
-    Uses hybrid ID + name matching for maximum coverage
-    """
-
-    if not profiles:
-        return profiles
-
+def _collect_company_refs(profiles: List[Dict[str, Any]]) -> Dict[int, str]:
+    """Collect {id: name} for all companies and schools referenced by profiles"""
     # Collect ALL IDs and names (companies + schools)
     id_to_name_map = {}
 
@@ -181,9 +242,14 @@ def enrich_profile_companies(profiles: List[Dict[str, Any]]) -> List[Dict[str, A
                 except:
                     pass
 
-    # Batch lookup with hybrid matching
-    enrichment_data = get_companies_hybrid(id_to_name_map)
+    return id_to_name_map
 
+
+def _apply_enrichment(
+    profiles: List[Dict[str, Any]],
+    enrichment_data: Dict[int, Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Merge domain + industry lookups into profile companies and schools"""
     # Merge into profiles
     for profile in profiles:
         # Enrich current companies
@@ -215,3 +281,29 @@ def enrich_profile_companies(profiles: List[Dict[str, Any]]) -> List[Dict[str, A
                     pass
 
     return profiles
+
+
+def enrich_profile_companies(profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Enrich companies AND education with domain + industry
+    Uses hybrid ID + name matching for maximum coverage
+    """
+
+    if not profiles:
+        return profiles
+
+    # Batch lookup with hybrid matching
+    enrichment_data = get_companies_hybrid(_collect_company_refs(profiles))
+
+    return _apply_enrichment(profiles, enrichment_data)
+
+
+async def enrich_profile_companies_async(profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Non-blocking variant of enrich_profile_companies"""
+
+    if not profiles:
+        return profiles
+
+    enrichment_data = await get_companies_hybrid_async(_collect_company_refs(profiles))
+
+    return _apply_enrichment(profiles, enrichment_data)
@@ -3,26 +3,32 @@ Company Search Service
 Queries linkedin-prod-companies index and returns company names
 """
 
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Optional, AsyncIterator
 from app.services.opensearch_client import opensearch_client
+from app.utils.cache import BoundedCache
+from app.utils.single_flight import SingleFlight
+from app.utils.session_token import criteria_hash
 from app.config import settings
 
-def search_companies(company_filters: dict, limit: int = 200) -> Tuple[List[str], int]:
-    """
-    Search companies and return their names for people query
+# Company name sets keyed by normalized criteria + limit
+company_result_cache = BoundedCache(
+    max_bytes=settings.company_cache_max_bytes,
+    ttl_seconds=settings.company_cache_ttl_seconds
+)
 
-    PRODUCTION OPTIMIZATIONS:
-    - Limit to 200 (from 1000) for better people query performance
-    - Score by size, followers, employeesOnLi (get BEST companies)
-    - Only fetch 'name' field (reduce payload)
-    - Use filter clauses (enable caching)
+# Concurrent misses for the same criteria share one OpenSearch query
+company_fill_flight = SingleFlight()
+
+def build_company_query(company_filters: dict, limit: int = 200) -> dict:
+    """
+    Build the OpenSearch company query for the given criteria
 
     Args:
         company_filters: Dictionary of company criteria
-        limit: Max companies to return (default 200, testing with higher limits)
+        limit: Max companies to return
 
     Returns:
-        Tuple of (company_names, total_matched)
+        OpenSearch query body
     """
     limit = min(limit, 10000)  # TESTING: Increased cap from 500 to 2000
 
@@ -250,12 +256,11 @@ def search_companies(company_filters: dict, limit: int = 200) -> Tuple[List[str]
             {'followers': {'order': 'desc', 'missing': '_last'}}
         ]
 
-    # Execute query
-    results = opensearch_client.client.search(
-        index=settings.companies_index,
-        body=query
-    )
+    return query
+
 
+def _extract_company_names(results: dict) -> Tuple[List[str], int]:
+    """Extract unique company names (in relevance order) and the total hit count"""
     # Extract and clean company names (PRESERVE RELEVANCE ORDER!)
     company_names = []
     seen = set()
@@ -268,8 +273,274 @@ def search_companies(company_filters: dict, limit: int = 200) -> Tuple[List[str]
 
     # DO NOT alphabetically sort - preserve relevance order from OpenSearch!
     # (When company_name/specialties specified, results are sorted by _score for exact matches first)
-    company_names_unique = company_names
-
     total_matched = results['hits']['total']['value']
 
-    return company_names_unique, total_matched
+    return company_names, total_matched
+
+
+def search_companies(company_filters: dict, limit: int = 200) -> Tuple[List[str], int]:
+    """
+    Search companies and return their names for people query
+
+    PRODUCTION OPTIMIZATIONS:
+    - Limit to 200 (from 1000) for better people query performance
+    - Score by size, followers, employeesOnLi (get BEST companies)
+    - Only fetch 'name' field (reduce payload)
+    - Use filter clauses (enable caching)
+
+    Args:
+        company_filters: Dictionary of company criteria
+        limit: Max companies to return (default 200, testing with higher limits)
+
+    Returns:
+        Tuple of (company_names, total_matched)
+    """
+    query = build_company_query(company_filters, limit)
+
+    # Execute query
+    results = opensearch_client.client.search(
+        index=settings.companies_index,
+        body=query
+    )
+
+    return _extract_company_names(results)
+
+
+async def search_companies_async(company_filters: dict, limit: int = 200) -> Tuple[List[str], int]:
+    """
+    Non-blocking variant of search_companies (uses the async OpenSearch client)
+
+    Returns:
+        Tuple of (company_names, total_matched)
+    """
+    query = build_company_query(company_filters, limit)
+
+    results = await opensearch_client.search(
+        index=settings.companies_index,
+        body=query
+    )
+
+    return _extract_company_names(results)
+
+
+async def stream_company_set_async(
+    company_filters: dict,
+    limit: int = 10000
+) -> AsyncIterator[Tuple[List[Tuple[str, Optional[int]]], int]]:
+    """
+    Stream the matching company set page by page
+
+    - Point-in-time + search_after paging (no single 10k-hit response)
+    - name.keyword / memberId read from doc values, _source is never loaded
+    - Exact total counted on the first page only
+    - A set that fits in one page is a single plain search (no PIT round trips)
+    - Falls back to plain search_after if a PIT can't be opened
+
+    Args:
+        company_filters: Dictionary of company criteria
+        limit: Max companies to stream
+
+    Yields:
+        ([(company_name, member_id or None), ...], total_matched) per page,
+        in the same order search_companies ranks them
+    """
+    page_size = min(settings.company_stream_page_size, limit)
+    query = build_company_query(company_filters, page_size)
+    query['_source'] = False
+    query['docvalue_fields'] = ['name.keyword', 'memberId']
+    # Tie-breakers for search_after: companies without a memberId can share the
+    # rank values, so the name follows (equal name and memberId is a duplicate
+    # the set drops anyway)
+    query['sort'].append({'memberId': {'order': 'asc', 'missing': '_last'}})
+    query['sort'].append({'name.keyword': {'order': 'asc'}})
+
+    client = opensearch_client.async_client
+    pit_id = None
+    if limit > page_size:
+        try:
+            pit = await client.create_point_in_time(
+                index=settings.companies_index,
+                keep_alive=settings.company_pit_keep_alive
+            )
+            pit_id = pit.get('pit_id')
+        except Exception as e:
+            print(f"Company PIT unavailable, paging without it: {e}")
+
+    if pit_id:
+        query['sort'].append({'_shard_doc': 'asc'})  # Unique within the PIT
+
+    remaining = limit
+    total_matched = 0
+
+    try:
+        while remaining > 0:
+            query['size'] = min(page_size, remaining)
+
+            if pit_id:
+                query['pit'] = {'id': pit_id, 'keep_alive': settings.company_pit_keep_alive}
+                results = await client.search(body=query)
+                pit_id = results.get('pit_id', pit_id)
+            else:
+                results = await opensearch_client.search(index=settings.companies_index, body=query)
+
+            hits = results['hits']['hits']
+            if query['track_total_hits']:
+                total_matched = results['hits']['total']['value']
+                query['track_total_hits'] = False  # Count once
+
+            page = []
+            for hit in hits:
+                fields = hit.get('fields', {})
+                names = fields.get('name.keyword') or ['']
+                member_ids = fields.get('memberId') or [None]
+                page.append((names[0].strip(), member_ids[0]))
+
+            yield page, total_matched
+
+            remaining -= len(hits)
+            if len(hits) < query['size']:
+                break
+            query['search_after'] = hits[-1]['sort']
+
+    finally:
+        if pit_id:
+            try:
+                await client.delete_point_in_time(body={'pit_id': [pit_id]})
+            except Exception as e:
+                print(f"Error deleting company PIT: {e}")
+
+
+async def fetch_company_set_async(
+    company_filters: dict,
+    limit: int = 10000
+) -> Tuple[List[str], int, Dict[str, int]]:
+    """
+    Collect the streamed company set
+
+    Returns:
+        Tuple of (company_names, total_matched, company_ids)
+        company_names: unique names in ranking order
+        company_ids: {company_name: memberId} for companies that have one
+    """
+    company_names = []
+    company_ids = {}
+    seen = set()
+    total_matched = 0
+
+    async for page, total_matched in stream_company_set_async(company_filters, limit):
+        for name, member_id in page:
+            if name and name not in seen:
+                company_names.append(name)
+                seen.add(name)
+                if member_id is not None:
+                    company_ids[name] = int(member_id)
+
+    return company_names, total_matched, company_ids
+
+
+def company_cache_key(company_filters: dict, limit: int) -> str:
+    return f"{criteria_hash(company_filters)}:{limit}"
+
+
+async def search_companies_cached(
+    company_filters: dict,
+    limit: int = 200
+) -> Tuple[List[str], int, Dict[str, int]]:
+    """
+    Streamed company set (fetch_company_set_async) behind the shared company-result cache
+
+    Key: md5 of the normalized criteria (same hash as session tokens) + limit.
+    Concurrent misses for the same key are coalesced into one query.
+    Cached values are shared - callers must not mutate them.
+
+    Returns:
+        Tuple of (company_names, total_matched, company_ids)
+    """
+    key = company_cache_key(company_filters, limit)
+
+    cached = company_result_cache.get(key)
+    if cached is not None:
+        return cached
+
+    async def fill() -> Tuple[List[str], int, Dict[str, int]]:
+        result = await fetch_company_set_async(company_filters, limit)
+        company_result_cache.set(key, result)
+        return result
+
+    return await company_fill_flight.do(key, fill)
+
+
+async def count_companies_async(company_filters: dict, cached_limits: List[int] = ()) -> int:
+    """
+    Number of companies matching the criteria (size-0 query)
+
+    Any company set already cached for one of cached_limits carries the total,
+    in which case no query is sent. The count itself is cached as the
+    (empty) limit-0 company set.
+    """
+    for limit in (0, *cached_limits):
+        cached = company_result_cache.get(company_cache_key(company_filters, limit))
+        if cached is not None:
+            return cached[1]
+
+    key = company_cache_key(company_filters, 0)
+
+    async def fill() -> Tuple[List[str], int, Dict[str, int]]:
+        query = build_company_query(company_filters, 0)
+        query['_source'] = False
+        query.pop('sort', None)
+
+        results = await opensearch_client.search(
+            index=settings.companies_index,
+            body=query,
+            filter_path='hits.total'
+        )
+        result = ([], results['hits']['total']['value'], {})
+        company_result_cache.set(key, result)
+        return result
+
+    return (await company_fill_flight.do(key, fill))[1]
+
+
+async def match_employer_companies_async(
+    company_filters: dict,
+    employer_names: List[str]
+) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Which of the given employer names are companies matching the criteria
+
+    One bulk query: the company criteria plus a terms filter on name.keyword.
+    Used for people-first execution, where the (few) employers of matching
+    people are checked against the company criteria.
+
+    Returns:
+        Tuple of (company_names in ranking order, {company_name: memberId})
+    """
+    if not employer_names:
+        return [], {}
+
+    query = build_company_query(company_filters, len(employer_names))
+    query['query']['bool']['filter'].append({'terms': {'name.keyword': employer_names}})
+    query['_source'] = False
+    query['docvalue_fields'] = ['name.keyword', 'memberId']
+    query['track_total_hits'] = False
+
+    results = await opensearch_client.search(
+        index=settings.companies_index,
+        body=query
+    )
+
+    company_names = []
+    company_ids = {}
+    seen = set()
+    for hit in results['hits']['hits']:
+        fields = hit.get('fields', {})
+        name = (fields.get('name.keyword') or [''])[0].strip()
+        if name and name not in seen:
+            company_names.append(name)
+            seen.add(name)
+            member_ids = fields.get('memberId')
+            if member_ids:
+                company_ids[name] = int(member_ids[0])
+
+    return company_names, company_ids
@@ -0,0 +1,86 @@
+"""
+Company Set Store
+Stores a resolved company set once as a document in a side index, so people
+queries can reference it with a terms-lookup filter instead of resending
+thousands of company names on every page
+"""
+
+import time
+import hashlib
+from typing import List, Dict, Optional
+from app.services.opensearch_client import opensearch_client
+from app.utils.cache import BoundedCache
+from app.config import settings
+
+# Set ids already written by this worker (skip re-indexing identical sets)
+_stored_sets = BoundedCache(
+    max_bytes=1024 * 1024,
+    ttl_seconds=settings.company_set_ttl_seconds,
+    sizeof=lambda value: 64
+)
+
+
+def company_set_id(company_names: List[str], company_ids: Dict[str, int]) -> str:
+    """Content-addressed set id: identical company sets share one document"""
+    digest = hashlib.md5()
+    for name in company_names:
+        digest.update(name.encode())
+        digest.update(b'\x00')
+        digest.update(str(company_ids.get(name, '')).encode())
+        digest.update(b'\x01')
+    return f"cs_{digest.hexdigest()}"
+
+
+async def store_company_set(
+    company_names: List[str],
+    company_ids: Optional[Dict[str, int]] = None
+) -> Optional[str]:
+    """
+    Store a company set in settings.company_sets_index
+
+    Document fields (paths for terms lookup):
+    - names: every company name
+    - ids: memberIds of companies that have one
+    - names_without_id: names of companies without a memberId
+
+    Returns:
+        Set id, or None if the set couldn't be stored (callers fall back to inline terms)
+    """
+    company_ids = company_ids or {}
+    set_id = company_set_id(company_names, company_ids)
+
+    if _stored_sets.get(set_id):
+        return set_id
+
+    document = {
+        'names': company_names,
+        'ids': sorted(set(company_ids.values())),
+        'names_without_id': [name for name in company_names if name not in company_ids],
+        'created_at': int(time.time())
+    }
+
+    try:
+        await opensearch_client.async_client.index(
+            index=settings.company_sets_index,
+            id=set_id,
+            body=document
+        )
+    except Exception as e:
+        print(f"Error storing company set {set_id}: {e}")
+        return None
+
+    _stored_sets.set(set_id, True)
+    return set_id
+
+
+def terms_lookup(field: str, set_id: str, path: str) -> Dict:
+    """terms filter that reads its values from a stored company set"""
+    return {
+        'terms': {
+            field: {
+                'index': settings.company_sets_index,
+                'id': set_id,
+                'path': path
+            }
+        }
+    }
@@ -3,18 +3,200 @@ OpenSearch Client Service
 Singleton pattern with connection pooling for Lambda efficiency
 """
 
-from opensearchpy import OpenSearch, RequestsHttpConnection
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+from opensearchpy import (
+    OpenSearch,
+    AsyncOpenSearch,
+    RequestsHttpConnection,
+    AsyncHttpConnection,
+    AWSV4SignerAsyncAuth
+)
+from opensearchpy.exceptions import HTTP_EXCEPTIONS, TransportError
 from requests_aws4auth import AWS4Auth
 import boto3
 from app.config import settings
 
+
+class MsearchBatcher:
+    """
+    Coalesces searches issued within a short window into one _msearch
+
+    Concurrent requests each searching on their own pay a signed HTTP round
+    trip per query. The batcher queues searches for `window_ms`, sends them
+    as one _msearch and resolves each caller with its own response.
+
+    - Searches are grouped by their response-level params (e.g. filter_path)
+    - A per-item error fails only that caller (as the matching TransportError)
+    - If the _msearch itself fails, its searches are retried one by one
+    - Callers stop waiting after `timeout` seconds (asyncio.TimeoutError)
+    """
+
+    # Per-search params carried in the _msearch header line
+    HEADER_PARAMS = {
+        'routing', 'preference', 'request_cache', 'search_type',
+        'allow_no_indices', 'expand_wildcards', 'ignore_unavailable'
+    }
+    # Params applying to the whole _msearch response
+    BATCH_PARAMS = {'filter_path', 'typed_keys', 'rest_total_hits_as_int'}
+
+    def __init__(self, get_client: Callable[[], AsyncOpenSearch], window_ms: float, max_batch: int, timeout: float):
+        self._get_client = get_client
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.timeout = timeout
+
+        self._pending: Dict[tuple, List[tuple]] = {}
+        self._timers: Dict[tuple, asyncio.TimerHandle] = {}
+        self._tasks = set()
+
+        self.searches = 0
+        self.batches = 0
+        self.batched_searches = 0
+        self.fallbacks = 0
+        self.timeouts = 0
+
+    def accepts(self, index: Optional[str], body: Optional[dict], params: Dict[str, Any]) -> bool:
+        """PIT searches (no index) and unsupported params go straight to the client"""
+        return (
+            index is not None
+            and 'pit' not in (body or {})
+            and set(params) <= self.HEADER_PARAMS | self.BATCH_PARAMS
+        )
+
+    async def search(self, index: str, body: dict, **params) -> Dict[str, Any]:
+        """Queue a search and wait for its response"""
+        loop = asyncio.get_running_loop()
+        key = tuple(sorted((name, str(value)) for name, value in params.items() if name in self.BATCH_PARAMS))
+        header = {'index': index}
+        header.update({name: value for name, value in params.items() if name in self.HEADER_PARAMS})
+
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((header, body, future))
+        self.searches += 1
+
+        if len(batch) >= self.max_batch:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+
+    def _flush(self, key: tuple):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._send(dict(key), batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch_params: Dict[str, str], batch: List[tuple]):
+        # Callers that timed out or were cancelled no longer need a response
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+
+        client = self._get_client()
+        if len(batch) == 1:
+            await self._send_one(client, batch_params, batch[0])
+            return
+
+        body = []
+        for header, query, _ in batch:
+            body.append(header)
+            body.append(query)
+
+        params = dict(batch_params)
+        if 'filter_path' in params:
+            params['filter_path'] = _msearch_filter_path(params['filter_path'])
+
+        try:
+            result = await client.msearch(body=body, **params)
+            responses = result['responses']
+            if len(responses) != len(batch):
+                raise ValueError(f"_msearch returned {len(responses)} responses for {len(batch)} searches")
+        except Exception as e:
+            print(f"Batched _msearch failed, retrying {len(batch)} searches individually: {e}")
+            self.fallbacks += 1
+            await asyncio.gather(*(self._send_one(client, batch_params, item) for item in batch))
+            return
+
+        self.batches += 1
+        self.batched_searches += len(batch)
+
+        for (_, _, future), response in zip(batch, responses):
+            if future.done():
+                continue
+            status = response.pop('status', 200)
+            if 'error' in response:
+                future.set_exception(_item_error(status, response['error']))
+            else:
+                future.set_result(response)
+
+    async def _send_one(self, client: AsyncOpenSearch, batch_params: Dict[str, str], item: tuple):
+        header, query, future = item
+        params = {name: value for name, value in header.items() if name != 'index'}
+        params.update(batch_params)
+        try:
+            response = await client.search(index=header['index'], body=query, **params)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(response)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'window_ms': self.window * 1000,
+            'searches': self.searches,
+            'batches': self.batches,
+            'batched_searches': self.batched_searches,
+            'avg_batch_size': round(self.batched_searches / self.batches, 2) if self.batches else 0.0,
+            'fallbacks': self.fallbacks,
+            'timeouts': self.timeouts
+        }
+
+
+def _msearch_filter_path(filter_path: str) -> str:
+    """
+    Scope a search filter_path to the _msearch responses
+
+    responses.status is always kept so a fully filtered-out response still
+    holds its place in the array.
+    """
+    paths = filter_path.split(',') if isinstance(filter_path, str) else list(filter_path)
+    scoped = ['responses.status', 'responses.error'] + [f"responses.{path.strip()}" for path in paths]
+    return ','.join(scoped)
+
+
+def _item_error(status: int, error: Any) -> TransportError:
+    """The exception client.search would have raised for this _msearch item"""
+    error_type = error.get('type', 'unknown') if isinstance(error, dict) else str(error)
+    return HTTP_EXCEPTIONS.get(status, TransportError)(status, error_type, {'error': error})
+
 class OpenSearchClient:
     """
     Singleton OpenSearch client with connection pooling
     Reuses connection across Lambda invocations for better performance
+
+    Exposes two clients:
+    - client: blocking (requests) client for sync callers and health checks
+    - async_client: non-blocking (aiohttp) client for the async search pipeline
     """
     _instance = None
     _client = None
+    _async_client = None
+    _async_loop = None
+    _batcher = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -53,6 +235,25 @@ class OpenSearchClient:
             pool_maxsize=10  # Connection pooling for Lambda
         )
 
+    def _create_async_client(self) -> AsyncOpenSearch:
+        """Create the aiohttp-backed client (signs every request with SigV4)"""
+        credentials = boto3.Session().get_credentials()
+
+        return AsyncOpenSearch(
+            hosts=[{
+                'host': settings.opensearch_endpoint,
+                'port': 443
+            }],
+            http_auth=AWSV4SignerAsyncAuth(credentials, settings.aws_region, 'aoss'),
+            use_ssl=True,
+            verify_certs=True,
+            connection_class=AsyncHttpConnection,
+            timeout=30,
+            max_retries=2,
+            retry_on_timeout=True,
+            maxsize=settings.opensearch_async_pool_maxsize  # In-flight requests per worker
+        )
+
     @property
     def client(self):
         """Get OpenSearch client instance"""
@@ -60,5 +261,54 @@ class OpenSearchClient:
             self._initialize_client()
         return self._client
 
+    @property
+    def async_client(self) -> AsyncOpenSearch:
+        """
+        Get async OpenSearch client instance
+
+        The aiohttp session is bound to the event loop it was created on,
+        so a new client is created if the running loop changes
+        (e.g. separate asyncio.run() calls in scripts).
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = self._create_async_client()
+            self._async_loop = loop
+            self._batcher = None
+            if settings.msearch_batch_window_ms > 0:
+                client = self._async_client
+                self._batcher = MsearchBatcher(
+                    lambda: client,
+                    settings.msearch_batch_window_ms,
+                    settings.msearch_batch_max_size,
+                    settings.msearch_batch_timeout_seconds
+                )
+        return self._async_client
+
+    async def search(self, index: Optional[str] = None, body: Optional[dict] = None, **params) -> Dict[str, Any]:
+        """
+        Async search, batched with concurrent searches into one _msearch
+
+        Same call as async_client.search. PIT searches (no index) and calls
+        with params _msearch can't carry are sent directly.
+        """
+        client = self.async_client
+        if self._batcher is not None and self._batcher.accepts(index, body, params):
+            return await self._batcher.search(index, body, **params)
+        if index is None:
+            return await client.search(body=body, **params)
+        return await client.search(index=index, body=body, **params)
+
+    def batcher_stats(self) -> Optional[Dict[str, Any]]:
+        return self._batcher.stats() if self._batcher is not None else None
+
+    async def close_async(self):
+        """Close the async client's connection pool (call on shutdown)"""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+            self._async_loop = None
+            self._batcher = None
+
 # Global instance
 opensearch_client = OpenSearchClient()
@@ -3,35 +3,78 @@ People Search Service
 Queries linkedin_profiles_enriched_* with company name filter
 """
 
-from typing import List, Dict, Any
+import base64
+import json
+import time
+from typing import List, Dict, Any, Optional, Tuple, Union
+from opensearchpy.exceptions import TransportError
 from app.services.opensearch_client import opensearch_client
+from app.services.company_set_store import terms_lookup
 from app.config import settings
 
-def search_people_at_companies(
+# Facet name (people criteria key) → aggregated field
+FACET_FIELDS = {
+    'seniority': 'seniority_level',
+    'location_country': 'locationCountry.keyword',
+    'industry': 'industry.keyword',
+    'years_of_experience': 'total_experience_range'
+}
+
+def build_facet_aggregations(facets: List[str], facet_size: int = 10) -> Dict[str, Any]:
+    """terms aggregations for the requested facets (see FACET_FIELDS)"""
+    return {
+        facet: {'terms': {'field': FACET_FIELDS[facet], 'size': facet_size}}
+        for facet in facets
+    }
+
+def parse_facets(results: Dict[str, Any], facets: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """{facet: [{'value': ..., 'count': ...}, ...]} from an aggregation response"""
+    aggregations = results.get('aggregations', {})
+    return {
+        facet: [
+            {'value': bucket['key'], 'count': bucket['doc_count']}
+            for bucket in aggregations.get(facet, {}).get('buckets', [])
+        ]
+        for facet in facets
+    }
+
+def build_people_query(
     people_filters: dict,
     company_names: List[str],
     page: int = 1,
     page_size: int = 25,
-    cursor: str = None
+    cursor: str = None,
+    company_ids: Optional[Dict[str, int]] = None,
+    company_set_id: Optional[str] = None,
+    search_after: Optional[list] = None,
+    pit_id: Optional[str] = None,
+    track_total_hits: Union[bool, int] = True,
+    facets: Optional[List[str]] = None,
+    facet_size: int = 10
 ) -> Dict[str, Any]:
     """
-    Search people working at specific companies
-
-    PRODUCTION OPTIMIZATIONS:
-    - Sorted company names (research: sorted terms = 10-15% faster)
-    - Field filtering (return only essential fields, 70% smaller)
-    - Use filter clauses (non-scored, cached, faster)
-    - Cursor support for deep pagination
+    Build the OpenSearch people query for the given criteria and company filter
 
     Args:
         people_filters: People criteria (title, location, seniority, etc.)
-        company_names: List of company names from company query (already sorted)
-        page: Page number (1-20 for offset, ignored if cursor provided)
+        company_names: List of company names from company query
+        page: Page number (ignored if cursor provided)
         page_size: Results per page
-        cursor: For pages >20 (search_after cursor)
+        cursor: search_after cursor for deep pagination
+        company_ids: Optional {company_name: memberId}; when given, companies
+            with an id are matched on currentCompanies.company.companyId and
+            only id-less companies fall back to name matching
+        company_set_id: Optional stored company set (company_set_store); when
+            given, the company filter is a terms lookup instead of inline terms
+        search_after: Sort values of the previous page's last hit (takes
+            precedence over cursor and page)
+        pit_id: Optional point in time to search (query is sent without an index)
+        track_total_hits: True (exact), False (no count) or an upper bound
+        facets: Optional facet names (FACET_FIELDS) to aggregate in the same request
+        facet_size: Buckets per facet
 
     Returns:
-        OpenSearch response with matching profiles
+        OpenSearch query body
     """
     # Build query
     query = {
@@ -43,7 +86,7 @@ def search_people_at_companies(
             }
         },
         'size': page_size,
-        'track_total_hits': True,  # OPTIMIZATION: Only count up to 10K (50-80% faster!)
+        'track_total_hits': track_total_hits,  # Later session pages reuse page 1's total
         'timeout': '15s',  # Fail fast instead of blocking
         # FIELD FILTERING: Return comprehensive profile data
         '_source': {
@@ -71,17 +114,59 @@ def search_people_at_companies(
         ]
     }
 
-    # Pagination: Offset (pages 1-20) or Cursor (pages 20+)
-    if cursor:
+    # Pagination: search_after (session keys or cursor) or offset
+    if search_after:
+        query['search_after'] = search_after
+    elif cursor:
         # Deep pagination with cursor (efficient)
-        import json
         query['search_after'] = json.loads(base64.urlsafe_b64decode(cursor))
     else:
         # Shallow pagination with offset
         query['from'] = (page - 1) * page_size
 
+    # Point in time: every page reads the same snapshot (search renews the keep-alive)
+    if pit_id:
+        query['pit'] = {'id': pit_id, 'keep_alive': settings.people_pit_keep_alive}
+
+    # Facet counts over the whole match set, returned with the page
+    if facets:
+        query['aggs'] = build_facet_aggregations(facets, facet_size)
+
+    # KEY FILTER: Stored company set (terms lookup - only the set id is sent)
+    if company_set_id:
+        if company_ids:
+            query['query']['bool']['filter'].append({
+                'bool': {
+                    'should': [
+                        terms_lookup('currentCompanies.company.companyId', company_set_id, 'ids'),
+                        terms_lookup('current_company_extracted.keyword', company_set_id, 'names_without_id')
+                    ],
+                    'minimum_should_match': 1
+                }
+            })
+        else:
+            query['query']['bool']['filter'].append(
+                terms_lookup('current_company_extracted.keyword', company_set_id, 'names')
+            )
+
+    # KEY FILTER: Company ids (compact integer terms), names only for id-less companies
+    elif company_names and company_ids:
+        ids = sorted(set(company_ids.values()))
+        names_without_id = [name for name in company_names if name not in company_ids]
+
+        company_filters = [{'terms': {'currentCompanies.company.companyId': ids}}]
+        if names_without_id:
+            company_filters.append({'terms': {'current_company_extracted.keyword': names_without_id}})
+
+        query['query']['bool']['filter'].append({
+            'bool': {
+                'should': company_filters,
+                'minimum_should_match': 1
+            }
+        })
+
     # KEY FILTER: Company names (already sorted and deduped)
-    if company_names:
+    elif company_names:
         query['query']['bool']['filter'].append({
             'terms': {
                 'current_company_extracted.keyword': company_names  # Pre-sorted!
@@ -454,6 +539,43 @@ def search_people_at_companies(
         {'publicId.keyword': {'order': 'asc'}}  # Tie-breaker
     ]
 
+    return query
+
+
+def search_people_at_companies(
+    people_filters: dict,
+    company_names: List[str],
+    page: int = 1,
+    page_size: int = 25,
+    cursor: str = None,
+    company_ids: Optional[Dict[str, int]] = None,
+    company_set_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Search people working at specific companies
+
+    PRODUCTION OPTIMIZATIONS:
+    - Sorted company names (research: sorted terms = 10-15% faster)
+    - Field filtering (return only essential fields, 70% smaller)
+    - Use filter clauses (non-scored, cached, faster)
+    - Cursor support for deep pagination
+
+    Args:
+        people_filters: People criteria (title, location, seniority, etc.)
+        company_names: List of company names from company query (already sorted)
+        page: Page number (1-20 for offset, ignored if cursor provided)
+        page_size: Results per page
+        cursor: For pages >20 (search_after cursor)
+        company_ids: Optional {company_name: memberId} for id-based filtering
+        company_set_id: Optional stored company set id for a terms-lookup filter
+
+    Returns:
+        OpenSearch response with matching profiles
+    """
+    query = build_people_query(
+        people_filters, company_names, page, page_size, cursor, company_ids, company_set_id
+    )
+
     # Execute query
     results = opensearch_client.client.search(
         index=settings.profiles_index,
@@ -461,3 +583,212 @@ def search_people_at_companies(
     )
 
     return results
+
+
+async def search_people_at_companies_async(
+    people_filters: dict,
+    company_names: List[str],
+    page: int = 1,
+    page_size: int = 25,
+    cursor: str = None,
+    company_ids: Optional[Dict[str, int]] = None,
+    company_set_id: Optional[str] = None,
+    search_after: Optional[list] = None,
+    pit_id: Optional[str] = None,
+    track_total_hits: Union[bool, int] = True,
+    facets: Optional[List[str]] = None,
+    facet_size: int = 10
+) -> Dict[str, Any]:
+    """
+    Non-blocking variant of search_people_at_companies (uses the async OpenSearch client)
+
+    With pit_id the search runs against the point in time; the response's
+    pit_id (which may change) should be used for the next page. With
+    track_total_hits=False the response carries no hits.total.
+
+    Returns:
+        OpenSearch response with matching profiles
+    """
+    query = build_people_query(
+        people_filters, company_names, page, page_size, cursor, company_ids, company_set_id,
+        search_after, pit_id, track_total_hits, facets, facet_size
+    )
+
+    if pit_id:
+        return await opensearch_client.search(body=query)
+
+    results = await opensearch_client.search(
+        index=settings.profiles_index,
+        body=query
+    )
+
+    return results
+
+
+async def count_people_at_companies_async(
+    people_filters: dict,
+    company_names: List[str],
+    company_ids: Optional[Dict[str, int]] = None,
+    company_set_id: Optional[str] = None,
+    track_total_hits: Union[bool, int] = True
+) -> Tuple[int, str]:
+    """
+    Count matching people without fetching documents (size 0)
+
+    Args:
+        track_total_hits: True for an exact count, or an upper bound
+            (counting stops there and the relation becomes "gte")
+
+    Returns:
+        (count, relation) - relation is "eq" or "gte"
+    """
+    results = await aggregate_people_at_companies_async(
+        people_filters, company_names, company_ids, company_set_id,
+        track_total_hits=track_total_hits
+    )
+
+    total = results['hits']['total']
+    return total['value'], total.get('relation', 'eq')
+
+
+async def aggregate_people_at_companies_async(
+    people_filters: dict,
+    company_names: List[str],
+    company_ids: Optional[Dict[str, int]] = None,
+    company_set_id: Optional[str] = None,
+    facets: Optional[List[str]] = None,
+    facet_size: int = 10,
+    track_total_hits: Union[bool, int] = True
+) -> Dict[str, Any]:
+    """
+    size-0 people query: total and (optionally) facet aggregations, no documents
+
+    Returns:
+        OpenSearch response with hits.total and aggregations
+    """
+    query = build_people_query(
+        people_filters, company_names, 1, 0, None, company_ids, company_set_id,
+        track_total_hits=track_total_hits, facets=facets, facet_size=facet_size
+    )
+    query['_source'] = False
+    query.pop('sort', None)  # Nothing to rank
+
+    return await opensearch_client.search(
+        index=settings.profiles_index,
+        body=query,
+        filter_path='hits.total,aggregations'
+    )
+
+
+async def collect_employers_async(people_filters: dict, limit: int) -> Tuple[List[str], int]:
+    """
+    Current employers of people matching the people criteria alone (no company filter)
+
+    size-0 query with a terms aggregation on current_company_extracted.keyword.
+
+    Returns:
+        Tuple of (employer names, matching people count)
+    """
+    query = build_people_query(people_filters, [], 1, 0, track_total_hits=True)
+    query['_source'] = False
+    query.pop('sort', None)
+    query['aggs'] = {
+        'employers': {'terms': {'field': 'current_company_extracted.keyword', 'size': limit}}
+    }
+
+    results = await opensearch_client.search(
+        index=settings.profiles_index,
+        body=query,
+        filter_path='hits.total,aggregations'
+    )
+
+    buckets = results.get('aggregations', {}).get('employers', {}).get('buckets', [])
+    return [bucket['key'] for bucket in buckets], results['hits']['total']['value']
+
+
+async def fetch_sort_values(
+    people_filters: dict,
+    company_names: List[str],
+    size: int,
+    company_ids: Optional[Dict[str, int]] = None,
+    company_set_id: Optional[str] = None,
+    search_after: Optional[list] = None,
+    pit_id: Optional[str] = None
+) -> Tuple[List[list], Optional[str]]:
+    """
+    Sort values of the next `size` hits, without documents or counting
+
+    Used to reach deep pages cheaply: the sort values of every page_size-th hit
+    are the search_after keys of the pages that follow.
+
+    Returns:
+        ([sort values per hit], pit_id to use next)
+    """
+    query = build_people_query(
+        people_filters, company_names, 1, size, None, company_ids, company_set_id,
+        search_after, pit_id
+    )
+    query['_source'] = False
+    query['track_total_hits'] = False
+
+    if pit_id:
+        results = await opensearch_client.search(
+            body=query,
+            filter_path='hits.hits.sort,pit_id'
+        )
+    else:
+        results = await opensearch_client.search(
+            index=settings.profiles_index,
+            body=query,
+            filter_path='hits.hits.sort'
+        )
+
+    hits = results.get('hits', {}).get('hits', [])
+    return [hit['sort'] for hit in hits], results.get('pit_id', pit_id)
+
+
+# No PIT is opened before this time.monotonic() value (set when opening failed,
+# e.g. on a collection without PIT support - searches don't pay a failing call each)
+_pit_unavailable_until = 0.0
+
+
+async def open_people_pit() -> Optional[str]:
+    """
+    Open a point in time over the profile indices
+
+    Returns None if unsupported or failing; after a failure no PIT is tried
+    for settings.people_pit_retry_seconds.
+    """
+    global _pit_unavailable_until
+    if time.monotonic() < _pit_unavailable_until:
+        return None
+
+    try:
+        pit = await opensearch_client.async_client.create_point_in_time(
+            index=settings.profiles_index,
+            keep_alive=settings.people_pit_keep_alive
+        )
+        return pit.get('pit_id')
+    except Exception as e:
+        _pit_unavailable_until = time.monotonic() + settings.people_pit_retry_seconds
+        print(f"People PIT unavailable, paging the live index (next try in {settings.people_pit_retry_seconds}s): {e}")
+        return None
+
+
+# Error text of a search against a PIT that expired or was deleted
+PIT_MISSING_MARKERS = ('search_context_missing_exception', 'no search context found')
+
+
+def is_pit_missing_error(error: Exception) -> bool:
+    """True if a PIT search failed because the PIT no longer exists (not query errors or timeouts)"""
+    if not isinstance(error, TransportError) or not isinstance(error.status_code, int):
+        return False
+    text = f"{error.error} {error.info}".lower()
+    return error.status_code == 404 or any(marker in text for marker in PIT_MISSING_MARKERS)
+
+
+async def close_people_pit(pit_id: str):
+    try:
+        await opensearch_client.async_client.delete_point_in_time(body={'pit_id': [pit_id]})
+    except Exception as e:
+        print(f"Error deleting people PIT: {e}")
@@ -0,0 +1,174 @@
+"""
+Profile Index Router
+Maps publicId → profile index so point lookups hit exactly one index
+instead of fanning out over every linkedin_profiles_enriched_* index
+"""
+
+import json
+from array import array
+from typing import Optional, List, Dict, Any, Iterable
+from app.config import settings
+
+
+def _key_hash(public_id: str) -> int:
+    """
+    Non-zero 64-bit hash of a publicId (0 marks an empty slot)
+
+    Python's str hash: fast, and routes never leave the process, so its
+    per-process seed doesn't matter.
+    """
+    return (hash(public_id) & 0xFFFFFFFFFFFFFFFF) or 1
+
+
+class ProfileRouter:
+    """
+    Bounded, compact in-memory publicId → index map
+
+    - Learns routes from the _index of every profile hit it sees
+    - Can be preloaded from a snapshot file at startup
+    - Stores a 64-bit hash of each publicId (not the string) and an interned
+      index id in preallocated arrays: ~10 bytes per route
+    - Set-associative: a publicId lives in one bucket of WAYS slots, kept in
+      recency order; the least recently used route of a full bucket is dropped
+
+    A hash collision can only produce a wrong route, which lookups already
+    treat as stale (forget + fan-out).
+    """
+
+    WAYS = 8
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._index_names: List[str] = []
+        self._index_ids: Dict[str, int] = {}
+
+        self._buckets = max(0, -(-max_entries // self.WAYS))
+        slots = self._buckets * self.WAYS
+        self._keys = array('Q', bytes(8 * slots))
+        self._values = array('H', bytes(2 * slots))
+        self._entries = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def _intern(self, index: str) -> int:
+        index_id = self._index_ids.get(index)
+        if index_id is None:
+            index_id = len(self._index_names)
+            self._index_names.append(index)
+            self._index_ids[index] = index_id
+        return index_id
+
+    def _find(self, public_id: str):
+        """(bucket start, position in bucket or -1, key hash)"""
+        key = _key_hash(public_id)
+        base = (key % self._buckets) * self.WAYS
+        try:
+            return base, self._keys[base:base + self.WAYS].index(key), key
+        except ValueError:
+            return base, -1, key
+
+    def _move_to_front(self, base: int, position: int, key: int, value: int):
+        """Shift slots [0, position) back by one and put (key, value) first"""
+        if position:
+            self._keys[base + 1:base + position + 1] = self._keys[base:base + position]
+            self._values[base + 1:base + position + 1] = self._values[base:base + position]
+        self._keys[base] = key
+        self._values[base] = value
+
+    def lookup(self, public_id: str) -> Optional[str]:
+        """Return the index known to hold public_id, or None"""
+        if not self._buckets:
+            self.misses += 1
+            return None
+
+        base, position, key = self._find(public_id)
+        if position < 0:
+            self.misses += 1
+            return None
+
+        index_id = self._values[base + position]
+        self._move_to_front(base, position, key, index_id)
+        self.hits += 1
+        return self._index_names[index_id]
+
+    def record(self, public_id: str, index: str):
+        """Remember which index holds public_id"""
+        if not public_id or not index or not self._buckets:
+            return
+
+        base, position, key = self._find(public_id)
+        if position < 0:
+            # New route: the last slot (empty, or the bucket's LRU route) is dropped
+            position = self.WAYS - 1
+            if self._keys[base + position] == 0:
+                self._entries += 1
+        self._move_to_front(base, position, key, self._intern(index))
+
+    def record_hits(self, hits: Iterable[Dict[str, Any]]):
+        """Learn routes from raw OpenSearch hits (needs _source.publicId + _index)"""
+        for hit in hits:
+            public_id = hit.get('_source', {}).get('publicId')
+            if public_id:
+                self.record(public_id, hit.get('_index'))
+
+    def forget(self, public_id: str):
+        """Drop a stale route (profile no longer in the routed index)"""
+        if not self._buckets:
+            return
+
+        base, position, _ = self._find(public_id)
+        if position < 0:
+            return
+
+        last = base + self.WAYS - 1
+        slot = base + position
+        self._keys[slot:last] = self._keys[slot + 1:last + 1]
+        self._values[slot:last] = self._values[slot + 1:last + 1]
+        self._keys[last] = 0
+        self._values[last] = 0
+        self._entries -= 1
+
+    def load_snapshot(self, path: str) -> int:
+        """
+        Load routes from a snapshot file
+
+        Format: one route per line, either NDJSON
+        {"publicId": "john-smith-12345", "_index": "linkedin_profiles_enriched_3"}
+        or tab-separated "publicId<TAB>index".
+
+        Returns:
+            Number of routes loaded
+        """
+        loaded = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+
+                if line.startswith('{'):
+                    entry = json.loads(line)
+                    public_id, index = entry.get('publicId'), entry.get('_index')
+                else:
+                    public_id, _, index = line.partition('\t')
+
+                if public_id and index:
+                    self.record(public_id, index)
+                    loaded += 1
+
+        return loaded
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': self._entries,
+            'max_entries': self.max_entries,
+            'bytes': self._keys.itemsize * len(self._keys) + self._values.itemsize * len(self._values),
+            'indices': len(self._index_names),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+# Global instance
+profile_router = ProfileRouter(settings.profile_router_max_entries)
@@ -1,17 +1,145 @@
 """
 Profile Service - Individual Profile Lookup
 Fetch individual LinkedIn profiles by publicId or URN
+(async - uses the non-blocking OpenSearch client)
 """
 
-from typing import Optional, List, Dict, Any
+import asyncio
+import fnmatch
+from collections import defaultdict, deque
+from typing import Optional, List, Dict, Any, Tuple, AsyncIterator
 from app.services.opensearch_client import opensearch_client
+from app.services.profile_router import profile_router
+from app.utils.cache import BoundedCache
+from app.utils.disk_cache import DiskProfileStore
+from app.utils.single_flight import SingleFlight
 from app.config import settings
 
+# Full profile documents keyed by publicId (projections are applied locally)
+profile_cache = BoundedCache(
+    max_bytes=settings.profile_cache_max_bytes,
+    ttl_seconds=settings.profile_cache_ttl_seconds
+)
 
-def get_profile_by_id(public_id: str, include_fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+# publicIds known not to exist
+profile_negative_cache = BoundedCache(
+    max_bytes=settings.profile_negative_cache_max_bytes,
+    ttl_seconds=settings.profile_negative_cache_ttl_seconds,
+    sizeof=lambda value: 64  # Flat per-entry estimate (key + bookkeeping)
+)
+
+# Optional persistent tier between the in-process cache and OpenSearch
+profile_disk_store = DiskProfileStore(
+    settings.profile_disk_cache_path,
+    max_bytes=settings.profile_disk_cache_max_bytes,
+    ttl_seconds=settings.profile_disk_cache_ttl_seconds
+) if settings.profile_disk_cache_path else None
+
+# Concurrent lookups of the same publicId (and projection) share one search
+profile_flight = SingleFlight()
+
+
+def _caches_full_documents() -> bool:
+    """True if fetched documents are cached (so projections must be applied locally)"""
+    return profile_cache.max_bytes > 0 or profile_disk_store is not None
+
+
+async def _disk_get_many(public_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Read-through lookup in the persistent tier (promotes hits to memory)"""
+    if profile_disk_store is None or not public_ids:
+        return {}
+
+    try:
+        found = await asyncio.to_thread(profile_disk_store.get_many, public_ids)
+    except Exception as e:
+        print(f"Error reading profile disk cache: {e}")
+        return {}
+
+    for public_id, profile in found.items():
+        profile_cache.set(public_id, profile)
+
+    return found
+
+
+async def _remember_profiles(profiles: List[Dict[str, Any]]):
+    """Store freshly fetched full documents in memory and on disk"""
+    for profile in profiles:
+        profile_cache.set(profile['publicId'], profile)
+
+    if profile_disk_store is not None and profiles:
+        try:
+            await asyncio.to_thread(profile_disk_store.put_many, profiles)
+        except Exception as e:
+            print(f"Error writing profile disk cache: {e}")
+
+
+def profile_indices() -> List[str]:
+    """
+    Configured profile index set (from settings.profiles_index)
+
+    Accepts a wildcard pattern ("linkedin_profiles_enriched_*") or a
+    comma-separated list of concrete indices.
+    """
+    return [index.strip() for index in settings.profiles_index.split(',') if index.strip()]
+
+
+def _project(value: Dict[str, Any], paths: List[List[str]]) -> Dict[str, Any]:
+    result = {}
+
+    for key, child in value.items():
+        nested = []
+        whole = False
+        for path in paths:
+            if fnmatch.fnmatchcase(key, path[0]):
+                if len(path) == 1:
+                    whole = True
+                    break
+                nested.append(path[1:])
+
+        if whole:
+            result[key] = child
+        elif nested and isinstance(child, dict):
+            projected = _project(child, nested)
+            if projected:
+                result[key] = projected
+        elif nested and isinstance(child, list):
+            items = [_project(item, nested) for item in child if isinstance(item, dict)]
+            items = [item for item in items if item]
+            if items:
+                result[key] = items
+
+    return result
+
+
+def project_fields(profile: Dict[str, Any], include_fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Apply an include_fields projection locally
+
+    Same semantics as _source.includes: dotted paths ("currentCompanies.company.name")
+    and * wildcards, applied through arrays of objects. publicId and _index
+    are always kept.
+
+    Returns:
+        A new dict (cached documents are never handed out directly)
+    """
+    if not include_fields:
+        return dict(profile)
+
+    projected = _project(profile, [field.split('.') for field in include_fields])
+    for key in ('publicId', '_index'):
+        if key in profile:
+            projected[key] = profile[key]
+
+    return projected
+
+
+async def get_profile_by_id(public_id: str, include_fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
     """
     Fetch a single LinkedIn profile by publicId
 
+    Served from the in-process cache when possible; misses are remembered
+    briefly in the negative cache.
+
     Args:
         public_id: LinkedIn public ID (e.g., "john-smith-12345")
         include_fields: Optional list of fields to return (None = all fields)
@@ -20,20 +148,38 @@ def get_profile_by_id(public_id: str, include_fields: Optional[List[str]] = None
         Profile dict or None if not found
 
     Example:
-        profile = get_profile_by_id("john-smith-12345")
-    """
-    # Search across all 8 profile indices
-    indices = [
-        "linkedin_profiles_enriched_0",
-        "linkedin_profiles_enriched_1",
-        "linkedin_profiles_enriched_2",
-        "linkedin_profiles_enriched_3",
-        "linkedin_profiles_enriched_4",
-        "linkedin_profiles_enriched_5",
-        "linkedin_profiles_enriched_6",
-        "linkedin_profiles_enriched_7"
-    ]
+        profile = await get_profile_by_id("john-smith-12345")
+    """
+    # Cached full document: serve any projection locally
+    cached = profile_cache.get(public_id)
+    if cached is not None:
+        return project_fields(cached, include_fields)
+
+    if profile_negative_cache.get(public_id):
+        return None
+
+    stored = (await _disk_get_many([public_id])).get(public_id)
+    if stored is not None:
+        return project_fields(stored, include_fields)
+
+    # Only the search is coalesced; cache tiers above are answered per caller
+    fetch_fields = None if _caches_full_documents() else include_fields
+    if not settings.request_coalescing_enabled:
+        profile = await _search_profile(public_id, fetch_fields)
+    else:
+        key = (public_id, tuple(fetch_fields) if fetch_fields else None)
+        profile = await profile_flight.do(key, lambda: _search_profile(public_id, fetch_fields))
+
+    return project_fields(profile, include_fields) if profile is not None else None
 
+
+async def _search_profile(public_id: str, include_fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Search OpenSearch for one publicId (routed index first, then the fan-out)
+
+    Returns:
+        Profile (_source filtered to include_fields, if given) or None
+    """
     query = {
         "query": {
             "term": {
@@ -43,64 +189,68 @@ def get_profile_by_id(public_id: str, include_fields: Optional[List[str]] = None
         "size": 1
     }
 
-    # Field filtering if requested
+    # Field filtering if requested (callers pass None when caching - the caches store full documents)
     if include_fields:
         query["_source"] = {"includes": include_fields}
 
     try:
-        # Search all indices
-        for index in indices:
-            result = opensearch_client.client.search(
-                index=index,
+        hit = None
+
+        # Routed lookup: hit exactly one index when the publicId has been seen before
+        routed_index = profile_router.lookup(public_id)
+        if routed_index:
+            result = await opensearch_client.search(
+                index=routed_index,
+                body=query
+            )
+
+            if result['hits']['hits']:
+                hit = result['hits']['hits'][0]
+            else:
+                # Stale route - fall back to the fan-out
+                profile_router.forget(public_id)
+
+        if hit is None:
+            # One multi-index request instead of walking the indices one by one
+            result = await opensearch_client.search(
+                index=','.join(profile_indices()),
                 body=query
             )
 
             if result['hits']['hits']:
                 # Found it!
-                profile = result['hits']['hits'][0]['_source']
-                profile['_index'] = index  # Add which index it came from
-                return profile
+                hit = result['hits']['hits'][0]
+                profile_router.record(public_id, hit['_index'])
 
-        # Not found in any index
-        return None
+        if hit is None:
+            # Not found in any index
+            profile_negative_cache.set(public_id, True)
+            return None
+
+        profile = hit['_source']
+        profile['_index'] = hit['_index']  # Add which index it came from
+        if _caches_full_documents():
+            profile.setdefault('publicId', public_id)
+            await _remember_profiles([profile])
+
+        return profile
 
     except Exception as e:
         print(f"Error fetching profile {public_id}: {e}")
         return None
 
 
-def get_profiles_batch(public_ids: List[str], include_fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+def _batch_query(
+    public_ids: List[str],
+    include_fields: Optional[List[str]] = None,
+    fan_out: bool = False
+) -> Dict[str, Any]:
     """
-    Fetch multiple LinkedIn profiles by publicIds (batch lookup)
+    terms query for a chunk of publicIds
 
-    Args:
-        public_ids: List of LinkedIn public IDs
-        include_fields: Optional list of fields to return
-
-    Returns:
-        List of profile dicts (profiles not found are omitted)
-
-    Example:
-        profiles = get_profiles_batch(["john-smith-12345", "jane-doe-67890"])
+    fan_out=True (multi-index search): one hit per publicId, so an id stored
+    in several indices can't take the size budget of the others
     """
-    if not public_ids:
-        return []
-
-    # Limit batch size
-    public_ids = public_ids[:100]  # Max 100 at a time
-
-    # Search all 8 indices
-    indices = [
-        "linkedin_profiles_enriched_0",
-        "linkedin_profiles_enriched_1",
-        "linkedin_profiles_enriched_2",
-        "linkedin_profiles_enriched_3",
-        "linkedin_profiles_enriched_4",
-        "linkedin_profiles_enriched_5",
-        "linkedin_profiles_enriched_6",
-        "linkedin_profiles_enriched_7"
-    ]
-
     query = {
         "query": {
             "terms": {
@@ -109,58 +259,213 @@ def get_profiles_batch(public_ids: List[str], include_fields: Optional[List[str]
         },
         "size": len(public_ids)
     }
+    if fan_out:
+        query["collapse"] = {"field": "publicId.keyword"}
 
-    # Field filtering if requested
+    # Field filtering if requested (publicId is needed to map hits back)
     if include_fields:
-        query["_source"] = {"includes": include_fields}
+        query["_source"] = {"includes": list(dict.fromkeys(['publicId'] + include_fields))}
 
-    profiles = []
+    return query
+
+
+async def _msearch(searches: List[Tuple[str, Dict[str, Any]]]) -> List[Optional[List[Dict[str, Any]]]]:
+    """
+    Run (index, query) pairs as one _msearch round trip
+
+    Returns:
+        Hit lists in the same order as searches (None for a failed search -
+        its ids are unknown, not missing)
+    """
+    body = []
+    for index, query in searches:
+        body.append({"index": index})
+        body.append(query)
+
+    result = await opensearch_client.async_client.msearch(body=body)
+
+    hit_lists = []
+    for (index, _), response in zip(searches, result['responses']):
+        if 'error' in response:
+            print(f"Error in msearch on {index}: {response['error']}")
+            hit_lists.append(None)
+        else:
+            hit_lists.append(response['hits']['hits'])
+
+    return hit_lists
+
+
+async def _fetch_profiles_chunk(
+    public_ids: List[str],
+    include_fields: Optional[List[str]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch one chunk of profiles, keyed by publicId
+
+    Cached documents (memory, then disk) and known misses are answered
+    locally. For the rest:
+    Round trip 1: one _msearch with a search per routed index plus one
+    multi-index search for unrouted ids
+    Round trip 2 (stale routes only): multi-index search for ids whose route missed
+    """
+    fan_out_index = ','.join(profile_indices())
+    caching = _caches_full_documents()
+
+    fetch_fields = None if caching else include_fields
+
+    found = {}
+    missing = []
+    for public_id in public_ids:
+        cached = profile_cache.get(public_id)
+        if cached is not None:
+            found[public_id] = project_fields(cached, include_fields)
+        elif not profile_negative_cache.get(public_id):
+            missing.append(public_id)
+
+    if missing:
+        stored = await _disk_get_many(missing)
+        for public_id, profile in stored.items():
+            found[public_id] = project_fields(profile, include_fields)
+        missing = [pid for pid in missing if pid not in stored]
+
+    if not missing:
+        return found
+
+    fetched = {}
+
+    def collect(hits: List[Dict[str, Any]]):
+        profile_router.record_hits(hits)
+        for hit in hits:
+            profile = hit['_source']
+            public_id = profile.get('publicId')
+            if public_id in fetched:
+                continue  # De-duplicate across indices (first hit wins)
+            profile['_index'] = hit['_index']
+            fetched[public_id] = profile
+
+    routed = defaultdict(list)
+    unrouted = []
+    for public_id in missing:
+        routed_index = profile_router.lookup(public_id)
+        if routed_index:
+            routed[routed_index].append(public_id)
+        else:
+            unrouted.append(public_id)
+
+    id_lists = list(routed.values())
+    searches = [(index, _batch_query(ids, fetch_fields)) for index, ids in routed.items()]
+    if unrouted:
+        id_lists.append(unrouted)
+        searches.append((fan_out_index, _batch_query(unrouted, fetch_fields, fan_out=True)))
+
+    # Ids whose search failed: neither found nor known missing (never negative-cached)
+    failed = set()
+    for ids, hits in zip(id_lists, await _msearch(searches)):
+        if hits is None:
+            failed.update(ids)
+        else:
+            collect(hits)
+
+    # Drop stale routes and relearn them from the fan-out
+    stale = [
+        pid for ids in routed.values() for pid in ids
+        if pid not in fetched and pid not in failed
+    ]
+    if stale:
+        for public_id in stale:
+            profile_router.forget(public_id)
+
+        for hits in await _msearch([(fan_out_index, _batch_query(stale, fetch_fields, fan_out=True))]):
+            if hits is None:
+                failed.update(stale)
+            else:
+                collect(hits)
+
+    for public_id in missing:
+        profile = fetched.get(public_id)
+        if profile is not None:
+            found[public_id] = project_fields(profile, include_fields)
+        elif public_id not in failed:
+            profile_negative_cache.set(public_id, True)
+
+    if caching:
+        await _remember_profiles([fetched[pid] for pid in missing if pid in fetched])
+
+    return found
+
+
+async def iter_profiles_batch(
+    public_ids: List[str],
+    include_fields: Optional[List[str]] = None
+) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Stream (publicId, profile or None) pairs in request order
+
+    Ids are de-duplicated and split into chunks of settings.profile_batch_chunk_size.
+    Up to settings.profile_batch_concurrency chunks are in flight ahead of the
+    consumer, so memory stays bounded for very large id lists.
+    """
+    unique_ids = list(dict.fromkeys(public_ids))
+    chunk_size = settings.profile_batch_chunk_size
+    chunks = [unique_ids[i:i + chunk_size] for i in range(0, len(unique_ids), chunk_size)]
+
+    pending = deque()
+    next_chunk = 0
 
     try:
-        # Search all indices
-        for index in indices:
-            result = opensearch_client.client.search(
-                index=index,
-                body=query
-            )
+        while pending or next_chunk < len(chunks):
+            # Keep the window of in-flight chunks full
+            while next_chunk < len(chunks) and len(pending) < settings.profile_batch_concurrency:
+                chunk = chunks[next_chunk]
+                pending.append((chunk, asyncio.create_task(_fetch_profiles_chunk(chunk, include_fields))))
+                next_chunk += 1
 
-            for hit in result['hits']['hits']:
-                profile = hit['_source']
-                profile['_index'] = index
-                profiles.append(profile)
+            chunk, task = pending.popleft()
+            found = await task
 
-        return profiles
+            for public_id in chunk:
+                yield public_id, found.get(public_id)
 
-    except Exception as e:
-        print(f"Error batch fetching profiles: {e}")
-        return []
+    finally:
+        for _, task in pending:
+            task.cancel()
 
 
-def search_profiles_by_name_exact(full_name: str, limit: int = 10) -> List[Dict[str, Any]]:
+async def get_profiles_batch(public_ids: List[str], include_fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
     """
-    Search profiles by exact full name match (for name disambiguation)
+    Fetch multiple LinkedIn profiles by publicIds (batch lookup)
+
+    Uses _msearch per chunk of ids (routed index searches + one multi-index
+    search), with chunks fetched in parallel.
 
     Args:
-        full_name: Full name to search (e.g., "John Smith")
-        limit: Max results to return
+        public_ids: List of LinkedIn public IDs (duplicates are ignored)
+        include_fields: Optional list of fields to return
 
     Returns:
-        List of matching profiles
+        List of profile dicts in request order (profiles not found are omitted)
 
-    Use case: When multiple people have same name, return all matches
+    Example:
+        profiles = await get_profiles_batch(["john-smith-12345", "jane-doe-67890"])
     """
-    indices = [
-        "linkedin_profiles_enriched_0",
-        "linkedin_profiles_enriched_1",
-        "linkedin_profiles_enriched_2",
-        "linkedin_profiles_enriched_3",
-        "linkedin_profiles_enriched_4",
-        "linkedin_profiles_enriched_5",
-        "linkedin_profiles_enriched_6",
-        "linkedin_profiles_enriched_7"
-    ]
+    if not public_ids:
+        return []
 
-    query = {
+    try:
+        return [
+            profile
+            async for _, profile in iter_profiles_batch(public_ids, include_fields)
+            if profile
+        ]
+
+    except Exception as e:
+        print(f"Error batch fetching profiles: {e}")
+        return []
+
+
+def _name_query(full_name: str, limit: int) -> Dict[str, Any]:
+    """Exact (all terms) fullName match, ranked by relevance"""
+    return {
         "query": {
             "match": {
                 "fullName": {
@@ -178,26 +483,70 @@ def search_profiles_by_name_exact(full_name: str, limit: int = 10) -> List[Dict[
         }
     }
 
+
+def _name_hits_to_profiles(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Convert score-ordered hits to profiles (keeps _index and _score)"""
+    profile_router.record_hits(hits)
+
     profiles = []
+    for hit in hits:
+        profile = hit['_source']
+        profile['_index'] = hit['_index']
+        profile['_score'] = hit.get('_score')
+        profiles.append(profile)
 
-    try:
-        for index in indices:
-            result = opensearch_client.client.search(
-                index=index,
-                body=query
-            )
+    return profiles
 
-            for hit in result['hits']['hits']:
-                profile = hit['_source']
-                profile['_index'] = index
-                profiles.append(profile)
 
-            # Stop if we have enough
-            if len(profiles) >= limit:
-                break
+async def search_profiles_by_name_exact(full_name: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Search profiles by exact full name match (for name disambiguation)
 
-        return profiles[:limit]
+    One multi-index request: OpenSearch merges hits from every profile index
+    by _score, so the result is the global top-N rather than the first N
+    found in index order.
+
+    Args:
+        full_name: Full name to search (e.g., "John Smith")
+        limit: Max results to return
+
+    Returns:
+        List of matching profiles (best match first)
+
+    Use case: When multiple people have same name, return all matches
+    """
+    try:
+        result = await opensearch_client.search(
+            index=','.join(profile_indices()),
+            body=_name_query(full_name, limit)
+        )
+
+        return _name_hits_to_profiles(result['hits']['hits'])
 
     except Exception as e:
         print(f"Error searching by name: {e}")
         return []
+
+
+async def search_profiles_by_names_batch(full_names: List[str], limit: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Disambiguate many names in one _msearch round trip
+
+    Args:
+        full_names: Full names to search (duplicates are searched once)
+        limit: Max results per name
+
+    Returns:
+        Map of {full_name: [profiles, best match first]}
+    """
+    unique_names = list(dict.fromkeys(full_names))
+    if not unique_names:
+        return {}
+
+    index = ','.join(profile_indices())
+    hit_lists = await _msearch([(index, _name_query(name, limit)) for name in unique_names])
+
+    return {
+        name: _name_hits_to_profiles(hits or [])  # Failed searches report no matches
+        for name, hits in zip(unique_names, hit_lists)
+    }
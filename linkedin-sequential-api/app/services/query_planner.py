@@ -0,0 +1,90 @@
+"""
+Query Planner
+Chooses how a sequential search is executed - company-first, people-first or
+direct - from cheap count probes (or company totals already in the cache)
+"""
+
+import asyncio
+from typing import Any, Dict, List
+from app.services import company_service, people_service
+from app.utils.cache import BoundedCache
+from app.utils.session_token import criteria_hash, normalize_criteria
+from app.config import settings
+
+COMPANY_FIRST = 'company_first'  # Resolve companies, then filter people by them
+PEOPLE_FIRST = 'people_first'    # Filter people, then check their employers against the company criteria
+DIRECT = 'direct'                # No company criteria: search people only
+
+# Plans per (company criteria, people criteria) - probes run once per pair
+plan_cache = BoundedCache(
+    max_bytes=1024 * 1024,
+    ttl_seconds=settings.planner_cache_ttl_seconds,
+    sizeof=lambda plan: 512
+)
+
+
+async def plan_search(
+    company_criteria: dict,
+    people_criteria: dict,
+    has_company_filters: bool,
+    company_limits: List[int] = ()
+) -> Dict[str, Any]:
+    """
+    Pick the execution strategy for a new search
+
+    People-first wins when the people criteria alone match at most
+    settings.planner_people_first_max people and fewer people than companies
+    match: their employers are a far smaller company filter than the company
+    criteria would produce.
+
+    Args:
+        company_criteria: Filters for company query
+        people_criteria: Filters for people query
+        has_company_filters: False when no company filter is set
+        company_limits: Company set sizes whose cached sets can answer the company count
+
+    Returns:
+        {'strategy', 'reason', 'companies_estimate', 'people_estimate'}
+    """
+    if not has_company_filters:
+        return {'strategy': DIRECT, 'reason': 'No company criteria: people are searched directly'}
+
+    if not settings.planner_enabled or not normalize_criteria(people_criteria):
+        return {'strategy': COMPANY_FIRST, 'reason': 'No people criteria to probe: companies first'}
+
+    key = (criteria_hash(company_criteria), criteria_hash(people_criteria))
+    cached = plan_cache.get(key)
+    if cached is not None:
+        return cached
+
+    threshold = settings.planner_people_first_max
+    try:
+        companies_estimate, (people_estimate, people_relation) = await asyncio.gather(
+            company_service.count_companies_async(company_criteria, company_limits),
+            people_service.count_people_at_companies_async(
+                people_criteria, [], track_total_hits=threshold + 1
+            )
+        )
+    except Exception as e:
+        print(f"Planner probes failed, using company-first: {e}")
+        return {'strategy': COMPANY_FIRST, 'reason': 'Count probes failed: companies first'}
+
+    if people_relation == 'eq' and people_estimate <= threshold and people_estimate < companies_estimate:
+        plan = {
+            'strategy': PEOPLE_FIRST,
+            'reason': (
+                f"Selective people criteria ({people_estimate:,} people) vs broad company criteria "
+                f"({companies_estimate:,} companies): people first, employers checked in bulk"
+            )
+        }
+    else:
+        people_label = f">{threshold:,}" if people_relation != 'eq' else f"{people_estimate:,}"
+        plan = {
+            'strategy': COMPANY_FIRST,
+            'reason': f"{companies_estimate:,} companies vs {people_label} people: companies first"
+        }
+
+    plan['companies_estimate'] = companies_estimate
+    plan['people_estimate'] = people_estimate
+    plan_cache.set(key, plan)
+    return plan
@@ -0,0 +1,41 @@
+"""
+Search Response Cache
+Serialized /v1/search/sequential pages keyed by the normalized request, with
+strong ETags so clients holding a page get 304 Not Modified instead of the payload
+"""
+
+import hashlib
+from typing import Optional
+from app.utils.cache import BoundedCache
+from app.config import settings
+
+# Normalized request key -> (etag, response body bytes)
+search_response_cache = BoundedCache(
+    max_bytes=settings.response_cache_max_bytes,
+    ttl_seconds=settings.response_cache_ttl_seconds,
+    sizeof=lambda entry: len(entry[1]) + 128
+)
+
+
+def response_etag(body: bytes) -> str:
+    """Strong ETag: digest of the exact response bytes (session token included)"""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches etag
+
+    If-None-Match uses weak comparison, so W/ prefixes are ignored.
+    """
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == '*' or candidate == etag:
+            return True
+
+    return False
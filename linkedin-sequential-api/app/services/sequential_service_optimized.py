@@ -4,28 +4,210 @@ Coordinates company → people sequential queries with session management
 """
 
 import time
-import asyncio
 import base64
 import json
-from typing import Dict, Any
+import random
+import asyncio
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple
 from app.services import company_service, people_service
 from app.services import company_lookup_service
-from app.utils.session_token import generate_session_token, decode_session_token, validate_token_matches_criteria
+from app.services import company_set_store
+from app.services import query_planner
+from app.services.profile_router import profile_router
+from app.services import session_store
+from app.services.session_store import save_session, load_session, new_session_id
+from app.utils.single_flight import SingleFlight
+from app.utils.session_token import (
+    build_session_payload,
+    encode_session_token,
+    validate_token_matches_criteria,
+    token_company_ids,
+    criteria_hash,
+    set_session_companies
+)
 from app.config import settings
 
+# Concurrent identical searches (same criteria, page, token...) share one execution
+search_flight = SingleFlight()
+
+# OpenSearch index.max_result_window: offset reads past from + size = 10,000 are rejected
+MAX_RESULT_WINDOW = 10000
+
+def has_company_filters(company_criteria: dict) -> bool:
+    """False when no company filter is set (search people directly)"""
+    return any([
+        company_criteria.get('industry'),
+        company_criteria.get('size'),
+        company_criteria.get('location_country'),
+        company_criteria.get('founded_after'),
+        company_criteria.get('founded_before'),
+        company_criteria.get('location_contains'),
+        company_criteria.get('revenue_min'),
+        company_criteria.get('company_name'),
+        company_criteria.get('specialties'),
+        company_criteria.get('hq_city'),
+        company_criteria.get('domain'),             # NEW
+        company_criteria.get('funding_round'),      # NEW
+        company_criteria.get('lead_investor'),      # NEW
+        company_criteria.get('min_funding_rounds')  # NEW
+    ])
+
+
+def company_tiers(full: bool = False) -> list:
+    """
+    Company-set sizes tried in order (settings.company_tiers, ascending)
+
+    full=True skips straight to the largest tier (exact totals, deep pages).
+    """
+    tiers = sorted(int(tier) for tier in settings.company_tiers.split(',') if tier.strip()) or [10000]
+    return tiers[-1:] if full else tiers
+
+
+async def resolve_company_filter(company_criteria: dict, limit: int = 10000, exclude: Optional[set] = None):
+    """
+    Company stage: top `limit` matching companies (shared cache) in the
+    configured filter form, ranked by the company query's size/employees/followers sort
+
+    `exclude` leaves out companies already searched (a widened session's pinned tier).
+
+    Returns:
+        (company_names, companies_count, company_ids, company_set_id) - ids are
+        empty unless the id-based people filter is enabled, the set id is None
+        unless server-side company sets are enabled
+    """
+    company_names, companies_count, company_ids = await company_service.search_companies_cached(
+        company_criteria,
+        limit
+    )
+    if exclude:
+        company_names = [name for name in company_names if name not in exclude]
+        company_ids = {name: company_id for name, company_id in company_ids.items() if name not in exclude}
+
+    # Name-only filtering unless the id-based people filter is enabled
+    if settings.people_company_filter_mode != 'id':
+        company_ids = {}
+
+    # Store the set once server-side; pages reference it by id (terms lookup)
+    company_set_id = None
+    if settings.company_set_lookup_enabled and company_names:
+        company_set_id = await company_set_store.store_company_set(company_names, company_ids)
+
+    return company_names, companies_count, company_ids, company_set_id
+
+
+async def resolve_employer_filter(company_criteria: dict, people_criteria: dict):
+    """
+    People-first company stage: employers of people matching the people
+    criteria, kept if they match the company criteria (one bulk company query)
+
+    Returns:
+        (company_names, company_ids) - ids empty unless the id-based people filter is enabled
+    """
+    employers, _ = await people_service.collect_employers_async(
+        people_criteria,
+        settings.planner_people_first_max
+    )
+    company_names, company_ids = await company_service.match_employer_companies_async(
+        company_criteria,
+        employers
+    )
+
+    if settings.people_company_filter_mode != 'id':
+        company_ids = {}
+
+    return company_names, company_ids
+
+
 async def execute_sequential_search(
     company_criteria: dict,
     people_criteria: dict,
     page: int = 1,
     page_size: int = 25,
     session_token: str = None,
-    cursor: str = None
+    cursor: str = None,
+    facets: Optional[list] = None,
+    facet_size: int = 10,
+    facets_only: bool = False,
+    exact_total: bool = False,
+    stateless: bool = False
+) -> Dict[str, Any]:
+    """
+    Sequential search, coalesced with identical searches already in flight
+
+    Callers arriving while the same normalized request (criteria hashes,
+    page, page_size, token, cursor and options) is executing get that
+    execution's response - including its session token - instead of running
+    their own. Arguments and response as _execute_sequential_search.
+    """
+    arguments = dict(
+        company_criteria=company_criteria,
+        people_criteria=people_criteria,
+        page=page,
+        page_size=page_size,
+        session_token=session_token,
+        cursor=cursor,
+        facets=facets,
+        facet_size=facet_size,
+        facets_only=facets_only,
+        exact_total=exact_total,
+        stateless=stateless
+    )
+    if not settings.request_coalescing_enabled:
+        return await _execute_sequential_search(**arguments)
+
+    return await search_flight.do(
+        search_request_key(arguments),
+        lambda: _execute_sequential_search(**arguments)
+    )
+
+
+def search_request_key(arguments: Dict[str, Any]) -> tuple:
+    """
+    Normalized identity of a sequential search request
+
+    Args:
+        arguments: execute_sequential_search keyword arguments
+
+    Returns:
+        Hashable key: criteria hashes, page, page_size, token, cursor and options
+    """
+    return (
+        criteria_hash(arguments['company_criteria']),
+        criteria_hash(arguments['people_criteria']),
+        arguments.get('page', 1),
+        arguments.get('page_size', 25),
+        arguments.get('session_token'),
+        arguments.get('cursor'),
+        tuple(arguments.get('facets') or ()),
+        arguments.get('facet_size', 10),
+        arguments.get('facets_only', False),
+        arguments.get('exact_total', False),
+        arguments.get('stateless', False)
+    )
+
+
+async def _execute_sequential_search(
+    company_criteria: dict,
+    people_criteria: dict,
+    page: int = 1,
+    page_size: int = 25,
+    session_token: str = None,
+    cursor: str = None,
+    facets: Optional[list] = None,
+    facet_size: int = 10,
+    facets_only: bool = False,
+    exact_total: bool = False,
+    stateless: bool = False
 ) -> Dict[str, Any]:
     """
     Execute production-grade sequential company → people search
 
     FEATURES:
-    - Session tokens for pagination consistency
+    - Non-blocking OpenSearch I/O (AsyncOpenSearch, no thread per request)
+    - Server-side search sessions (short signed token) for pagination consistency
+    - Point-in-time snapshot + search_after for every page (no shifting results)
+    - Totals counted once per session (pages 2+ skip counting)
+    - Adaptive company tiers (page 1 widens the company set only if needed)
     - Hybrid pagination (offset 1-20, cursor 20+)
     - Smart fallback to direct search
     - Field filtering for performance
@@ -33,7 +215,8 @@ async def execute_sequential_search(
 
     Process:
     1. Check for session token (reuse company list)
-    2. If no token, query companies and generate token
+    2. If no token, plan the search (company-first / people-first / direct),
+       resolve the company filter and start a session
     3. Query people with company filter
     4. Return results with pagination info
 
@@ -44,6 +227,14 @@ async def execute_sequential_search(
         page_size: Results per page (10-50)
         session_token: Token from previous page (for consistency)
         cursor: Cursor for pages >20
+        facets: Optional facet names (people_service.FACET_FIELDS) counted
+            over all matched people and returned with the page
+        facet_size: Buckets per facet
+        facets_only: Return facet counts and totals only (size 0, no session)
+        exact_total: Use the full company set on page 1 instead of the
+            smallest company tier that fills the page
+        stateless: One-shot search (batch items): a new session gets no PIT,
+            isn't stored and isn't prefetched - its token is a stateless signed token
 
     Returns:
         {
@@ -66,13 +257,15 @@ async def execute_sequential_search(
         }
     """
     start_time = time.time()
-    loop = asyncio.get_event_loop()
+
+    # A paged request (token) continues its session even in a batch
+    one_shot = stateless and not session_token
 
     # OPTIMIZATION 1: Check if session token provided (pagination)
     if session_token:
         try:
-            # Decode token to get cached company list
-            token_payload = decode_session_token(session_token)
+            # Resolve token (session reference or stateless token) to the cached company list
+            token_payload = await load_session(session_token)
 
             # Validate token matches current criteria
             if not validate_token_matches_criteria(token_payload, company_criteria, people_criteria):
@@ -83,9 +276,17 @@ async def execute_sequential_search(
                 }
 
             # Use company list from token (skip company query!)
+            session_state = token_payload
             company_names = token_payload['cnames']
-            companies_count = len(company_names)
-            search_mode = 'sequential_cached'
+            company_ids = token_company_ids(token_payload)
+            company_set_id = token_payload.get('csid')
+            companies_count = token_payload.get('cc', len(company_names))
+            search_mode = {
+                'direct': 'direct',
+                'people_first': 'people_first_cached'
+            }.get(token_payload.get('mode'), 'sequential_cached')
+            tiers = None  # Pinned to the tier chosen on page 1
+            plan = None
 
         except ValueError as e:
             # Token invalid/expired
@@ -98,95 +299,205 @@ async def execute_sequential_search(
     else:
         # No token - first page, execute full sequential search
 
-        # Check if company criteria is empty (smart fallback)
-        has_company_filters = any([
-            company_criteria.get('industry'),
-            company_criteria.get('size'),
-            company_criteria.get('location_country'),
-            company_criteria.get('founded_after'),
-            company_criteria.get('founded_before'),
-            company_criteria.get('location_contains'),
-            company_criteria.get('revenue_min'),
-            company_criteria.get('company_name'),
-            company_criteria.get('specialties'),
-            company_criteria.get('hq_city'),
-            company_criteria.get('domain'),             # NEW
-            company_criteria.get('funding_round'),      # NEW
-            company_criteria.get('lead_investor'),      # NEW
-            company_criteria.get('min_funding_rounds')  # NEW
-        ])
-
-        if not has_company_filters:
+        # Plan: direct (no company criteria), people-first (selective people
+        # criteria, broad company criteria) or company-first
+        plan = await query_planner.plan_search(
+            company_criteria,
+            people_criteria,
+            has_company_filters(company_criteria),
+            company_tiers()
+        )
+
+        if plan['strategy'] == query_planner.DIRECT:
             # FALLBACK: Direct people search (no company filtering)
             search_mode = 'direct'
             company_names = []
+            company_ids = {}
+            company_set_id = None
             companies_count = 0
+            tiers = None
+        elif plan['strategy'] == query_planner.PEOPLE_FIRST:
+            # Few people match: their employers (checked against the company
+            # criteria) are the company filter - complete, so no tiers
+            search_mode = 'people_first'
+            company_names, company_ids = await resolve_employer_filter(company_criteria, people_criteria)
+            company_set_id = None
+            companies_count = plan['companies_estimate']
+            tiers = None
         else:
-            # STEP 1: Query companies (TESTING: increased limit)
+            # STEP 1: Query companies (shared cache - repeat criteria skip this stage)
+            # Adaptive: start with the smallest company tier, widen below if page 1 isn't filled
             search_mode = 'sequential'
-            company_names, companies_count = await loop.run_in_executor(
-                None,
-                company_service.search_companies,
+            tiers = company_tiers(full=exact_total or facets_only or page > 1 or bool(cursor))
+            company_names, companies_count, company_ids, company_set_id = await resolve_company_filter(
                 company_criteria,
-                10000  # NO LIMIT: Get ALL matching companies
+                tiers[0]
             )
 
-            if not company_names:
-                # No companies matched
-                return {
-                    'status': 'success',
-                    'results': [],
-                    'pagination': {
-                        'current_page': page,
-                        'page_size': page_size,
-                        'total_results': 0,
-                        'total_pages': 0,
-                        'has_next': False,
-                        'has_previous': False,
-                        'session_token': ''
-                    },
-                    'metadata': {
-                        'companies_matched': companies_count,
-                        'companies_used': 0,
-                        'company_filter_applied': 0,
-                        'profiles_matched': 0,
-                        'query_time_ms': int((time.time() - start_time) * 1000),
-                        'search_mode': search_mode,
-                        'suggestion': 'No companies matched your criteria. Try broadening company filters.'
-                    }
+        if search_mode != 'direct' and not company_names:
+            # No companies matched
+            return {
+                'status': 'success',
+                'results': [],
+                'pagination': {
+                    'current_page': page,
+                    'page_size': page_size,
+                    'total_results': 0,
+                    'total_pages': 0,
+                    'has_next': False,
+                    'has_previous': False,
+                    'session_token': ''
+                },
+                'metadata': {
+                    'companies_matched': companies_count,
+                    'companies_used': 0,
+                    'company_filter_applied': 0,
+                    'profiles_matched': 0,
+                    'query_time_ms': int((time.time() - start_time) * 1000),
+                    'search_mode': search_mode,
+                    'suggestion': 'No companies matched your criteria. Try broadening company filters.',
+                    'plan': plan
                 }
+            }
 
-    # STEP 2: Query people (optimized: field filtering, cursor support)
-    people_results = await loop.run_in_executor(
-        None,
-        people_service.search_people_at_companies,
-        people_criteria,
-        company_names,
-        page,
-        page_size,
-        cursor
-    )
+        session_state = None
 
-    # Extract results
-    profiles = [hit['_source'] for hit in people_results['hits']['hits']]
-    total_profiles = people_results['hits']['total']['value']
-    total_pages = (total_profiles + page_size - 1) // page_size
+    if facets_only:
+        return await _facets_only_response(
+            people_criteria,
+            company_names,
+            company_ids,
+            company_set_id,
+            companies_count,
+            search_mode,
+            facets or [],
+            facet_size,
+            page,
+            page_size,
+            session_token,
+            start_time
+        )
 
-    # Generate or reuse session token
-    if not session_token and company_names:
-        new_session_token = generate_session_token(
+    if session_state is None:
+        # New session: the company list plus a point in time shared by every page
+        session_state = build_session_payload(
             company_names,
             company_criteria,
-            people_criteria
+            people_criteria,
+            search_id=new_session_id(),
+            company_ids=company_ids,
+            company_set_id=company_set_id
         )
+        session_state['cc'] = companies_count  # Companies matched
+        session_state['mode'] = search_mode
+        if tiers:
+            session_state['tier'] = tiers[0]
+        if settings.people_pit_enabled and not one_shot:
+            pit_id = await people_service.open_people_pit()
+            if pit_id:
+                session_state['pit'] = pit_id
+
+    # Pages are driven by search_after from the previous page's last hit; a
+    # page jump walks sort values from the nearest checkpoint (offset if that fails)
+    if session_state.get('ps') != page_size:
+        # Page boundaries moved - keys recorded for another page size don't apply
+        session_state['after'] = {}
+        session_state['ps'] = page_size
+        if 'pinned' in session_state:
+            session_state['pinned']['after'] = {}
+
+    # STEP 2: Query people (optimized: field filtering, cursor support)
+    # Pages list the pinned tier's people first; once a page reaches their end,
+    # the session is widened and later pages list the people beyond the tier
+    full_tier = company_tiers(full=True)[0]
+    while True:
+        pinned = session_state.get('pinned')
+        if pinned and page < _first_widened_page(pinned, page_size):
+            segment = await _pinned_segment(session_state, company_criteria)
+            segment_page = page
+        else:
+            segment = session_state
+            segment_page = page - _first_widened_page(pinned, page_size) + 1 if pinned else page
+
+        people_results = await _read_segment_page(
+            segment,
+            company_criteria,
+            people_criteria,
+            segment_page,
+            page_size,
+            cursor,
+            facets,
+            facet_size,
+            tiers,
+            companies_count
+        )
+        if segment is not session_state:
+            if segment.get('pit'):
+                session_state['pit'] = segment['pit']  # Reopened while reading the pinned tier
+            break
+
+        segment_tier = session_state.get('tier')
+        if (
+            pinned
+            or not segment_tier
+            or segment_tier >= full_tier
+            or companies_count <= segment_tier
+            or segment_page * page_size < session_state['pt']
+        ):
+            break
+
+        # This page reaches the end of the pinned tier's people - more companies matched
+        if not await _widen_session(session_state, company_criteria, people_criteria, full_tier):
+            break
+        if page < _first_widened_page(session_state['pinned'], page_size):
+            break  # Served from the pinned tier; the next page starts beyond it
+        tiers = None  # Read this page beyond the pinned tier
+
+    hits = people_results['hits']['hits']
+    company_names = segment['cnames']
+    pinned = session_state.get('pinned')
+
+    # Companies beyond the session's tier aren't searched: the total is a lower bound
+    company_tier = session_state.get('tier')
+    total_relation = 'gte' if company_tier and companies_count > company_tier else 'eq'
+
+    # Extract results (and learn publicId → index routes for profile lookups)
+    profile_router.record_hits(hits)
+    profiles = [hit['_source'] for hit in hits]
+    segment_pages = (segment['pt'] + page_size - 1) // page_size
+    if pinned:
+        total_profiles = pinned['pt'] + session_state['pt']
+        total_pages = _first_widened_page(pinned, page_size) - 1 + (session_state['pt'] + page_size - 1) // page_size
+        companies_used = pinned['cu'] + len(session_state['cnames'])
     else:
-        new_session_token = session_token or ''
+        total_profiles = session_state['pt']
+        total_pages = segment_pages
+        companies_used = len(company_names)
+
+    # Hand back the (updated) session
+    if one_shot:
+        new_session_token = encode_session_token(session_state)
+    else:
+        new_session_token = await save_session(session_state)
+
+    # Extend checkpoints ahead of the user in the background
+    if segment is session_state and not one_shot:
+        _schedule_prefetch(
+            session_state,
+            people_criteria,
+            company_names,
+            token_company_ids(session_state),
+            session_state.get('csid'),
+            segment_page,
+            page_size,
+            segment_pages
+        )
 
     # Generate cursor for next page if needed
     next_cursor = None
-    if people_results['hits']['hits'] and page >= 20 and (page * page_size) < total_profiles:
+    if hits and page >= 20 and (segment_page * page_size) < segment['pt']:
         # Get sort values from last hit for search_after
-        last_hit = people_results['hits']['hits'][-1]
+        last_hit = hits[-1]
         sort_values = last_hit.get('sort', [])
         if sort_values:
             next_cursor = base64.urlsafe_b64encode(json.dumps(sort_values).encode()).decode()
@@ -199,7 +510,7 @@ async def execute_sequential_search(
         suggestion = f"{companies_count:,} companies matched. Consider adding location, size, or founded_after filters to refine results."
 
     # ENRICHMENT: Add company domain + industry to all company objects
-    profiles = company_lookup_service.enrich_profile_companies(profiles)
+    profiles = await company_lookup_service.enrich_profile_companies_async(profiles)
 
     return {
         'status': 'success',
@@ -209,18 +520,649 @@ async def execute_sequential_search(
             'page_size': page_size,
             'total_results': total_profiles,
             'total_pages': total_pages,
-            'has_next': (page * page_size) < total_profiles,
+            'has_next': page < total_pages,
             'has_previous': page > 1,
             'session_token': new_session_token,
             'next_cursor': next_cursor
         },
         'metadata': {
             'companies_matched': companies_count,
-            'companies_used': len(company_names),
-            'company_filter_applied': len(company_names),
+            'companies_used': companies_used,
+            'company_filter_applied': companies_used,
             'profiles_matched': total_profiles,
             'query_time_ms': query_time_ms,
             'search_mode': search_mode,
-            'suggestion': suggestion
+            'suggestion': suggestion,
+            'total_relation': total_relation,
+            'company_tier': company_tier,
+            'plan': plan
+        },
+        'facets': people_service.parse_facets(people_results, facets) if facets else None
+    }
+
+
+async def _read_segment_page(
+    segment: Dict[str, Any],
+    company_criteria: dict,
+    people_criteria: dict,
+    page: int,
+    page_size: int,
+    cursor: str,
+    facets: Optional[list],
+    facet_size: int,
+    tiers: Optional[list],
+    companies_count: int
+) -> Dict[str, Any]:
+    """
+    Read one page of a session segment (its company filter, keys and total)
+
+    Page 1 of a new session (`tiers` given) widens to the next tier while the
+    page can't be filled. Records the next page's key and the segment total.
+
+    Returns:
+        People search response
+    """
+    company_names = segment['cnames']
+    company_ids = token_company_ids(segment)
+    company_set_id = segment.get('csid')
+
+    search_after = None
+    if not cursor and page > 1:
+        search_after = await _page_search_after(
+            segment,
+            people_criteria,
+            company_names,
+            company_ids,
+            company_set_id,
+            page,
+            page_size
+        )
+
+    # Without a key the page is read by offset, which can't reach past the result
+    # window: answer those with an empty page (totals and facets still counted)
+    beyond_window = (
+        not cursor
+        and page > 1
+        and search_after is None
+        and page * page_size > MAX_RESULT_WINDOW
+    )
+
+    # The total can't change within a session: count once (page 1), reuse it after
+    stored_total = segment.get('pt')
+
+    tier_index = 0
+    while True:
+        people_results = await _search_people_page(
+            segment,
+            people_criteria,
+            company_names,
+            company_ids,
+            company_set_id,
+            1 if beyond_window else page,
+            0 if beyond_window else page_size,
+            cursor,
+            search_after,
+            track_total_hits=stored_total is None,
+            facets=facets,
+            facet_size=facet_size
+        )
+        company_set_id = segment.get('csid')  # Dropped if the set lookup failed
+        hits = people_results['hits']['hits']
+
+        if (
+            not tiers
+            or tier_index + 1 >= len(tiers)
+            or len(hits) >= page_size
+            or companies_count <= tiers[tier_index]
+        ):
+            break
+
+        # Page not filled and more companies exist - widen to the next tier
+        tier_index += 1
+        company_names, companies_count, company_ids, company_set_id = await resolve_company_filter(
+            company_criteria,
+            tiers[tier_index]
+        )
+        set_session_companies(segment, company_names, company_ids, company_set_id)
+        segment['tier'] = tiers[tier_index]
+
+    # Remember where the next page starts
+    if hits and hits[-1].get('sort'):
+        _remember_key(segment['after'], page + 1, hits[-1]['sort'])
+    segment['pt'] = stored_total if stored_total is not None else people_results['hits']['total']['value']
+
+    return people_results
+
+
+def _first_widened_page(pinned: Dict[str, Any], page_size: int) -> int:
+    """First page listing people beyond a widened session's pinned tier"""
+    return (pinned['pt'] + page_size - 1) // page_size + 1
+
+
+async def _widen_session(
+    session_state: Dict[str, Any],
+    company_criteria: dict,
+    people_criteria: dict,
+    tier: int
+) -> bool:
+    """
+    Continue a session past its pinned tier, up to `tier` companies
+
+    The pinned tier's total, keys and tier move to session_state['pinned']
+    (pages listing its people are unchanged); the session's company filter
+    becomes the companies beyond it, counted once.
+
+    Returns:
+        False if no companies lie beyond the pinned tier (the session keeps it)
+    """
+    pinned_names = session_state['cnames']
+    company_names, _, company_ids, company_set_id = await resolve_company_filter(
+        company_criteria,
+        tier,
+        exclude=set(pinned_names)
+    )
+    if not company_names:
+        return False
+
+    session_state['pinned'] = {
+        'pt': session_state['pt'],
+        'tier': session_state['tier'],
+        'cu': len(pinned_names),
+        'after': session_state['after']
+    }
+    set_session_companies(session_state, company_names, company_ids, company_set_id)
+    session_state['tier'] = tier
+    session_state['after'] = {}
+
+    counted = await _search_people_page(
+        session_state,
+        people_criteria,
+        company_names,
+        company_ids,
+        company_set_id,
+        1,
+        0,
+        None,
+        None
+    )
+    session_state['pt'] = counted['hits']['total']['value']
+    return True
+
+
+async def _pinned_segment(session_state: Dict[str, Any], company_criteria: dict) -> Dict[str, Any]:
+    """Read view of a widened session's pinned tier (its filter, keys and total; the session's PIT)"""
+    pinned = session_state['pinned']
+    company_names, _, company_ids, company_set_id = await resolve_company_filter(
+        company_criteria,
+        pinned['tier']
+    )
+    segment = {
+        'sid': session_state['sid'],
+        'after': pinned['after'],
+        'pt': pinned['pt'],
+        'tier': pinned['tier']
+    }
+    if session_state.get('pit'):
+        segment['pit'] = session_state['pit']
+    set_session_companies(segment, company_names, company_ids, company_set_id)
+    return segment
+
+
+async def _search_people_page(
+    session_state: Dict[str, Any],
+    people_criteria: dict,
+    company_names: list,
+    company_ids: dict,
+    company_set_id: str,
+    page: int,
+    page_size: int,
+    cursor: str,
+    search_after: list,
+    track_total_hits: bool = True,
+    facets: Optional[list] = None,
+    facet_size: int = 10
+) -> Dict[str, Any]:
+    """
+    Run one people page in the session's PIT, recovering from lost session resources:
+    - PIT gone (keep-alive lapsed between pages): reopen it once, close the old one and retry
+      (other errors - query errors, timeouts - are not PIT problems and propagate)
+    - Stored company set unavailable (e.g. side index cleaned up): resend the names inline
+    """
+    pit_id = session_state.get('pit')
+    pit_reopened = False
+
+    while True:
+        try:
+            results = await people_service.search_people_at_companies_async(
+                people_criteria,
+                company_names,
+                page,
+                page_size,
+                cursor,
+                company_ids,
+                company_set_id,
+                search_after,
+                pit_id,
+                track_total_hits,
+                facets,
+                facet_size
+            )
+            break
+        except Exception as e:
+            if pit_id and not pit_reopened and people_service.is_pit_missing_error(e):
+                print(f"People PIT expired, reopening: {e}")
+                # Close the replaced PIT too (a no-op if it is already gone)
+                pit_id, _ = await asyncio.gather(
+                    people_service.open_people_pit(),
+                    people_service.close_people_pit(pit_id)
+                )
+                pit_reopened = True
+            elif company_set_id:
+                print(f"Company set lookup failed ({company_set_id}), using inline terms: {e}")
+                company_set_id = None
+                session_state.pop('csid', None)
+            else:
+                raise
+
+    # The PIT id may change between requests
+    pit_id = results.get('pit_id', pit_id)
+    if pit_id:
+        session_state['pit'] = pit_id
+    else:
+        session_state.pop('pit', None)
+
+    return results
+
+
+async def _facets_only_response(
+    people_criteria: dict,
+    company_names: list,
+    company_ids: dict,
+    company_set_id: str,
+    companies_count: int,
+    search_mode: str,
+    facets: list,
+    facet_size: int,
+    page: int,
+    page_size: int,
+    session_token: str,
+    start_time: float
+) -> Dict[str, Any]:
+    """Facet counts and totals from one size-0 people query (no profiles, no new session)"""
+    try:
+        results = await people_service.aggregate_people_at_companies_async(
+            people_criteria, company_names, company_ids, company_set_id, facets, facet_size
+        )
+    except Exception as e:
+        if not company_set_id:
+            raise
+        print(f"Company set lookup failed ({company_set_id}), using inline terms: {e}")
+        results = await people_service.aggregate_people_at_companies_async(
+            people_criteria, company_names, company_ids, None, facets, facet_size
+        )
+
+    total_profiles = results['hits']['total']['value']
+
+    return {
+        'status': 'success',
+        'results': [],
+        'pagination': {
+            'current_page': page,
+            'page_size': page_size,
+            'total_results': total_profiles,
+            'total_pages': (total_profiles + page_size - 1) // page_size,
+            'has_next': False,
+            'has_previous': False,
+            'session_token': session_token or ''
+        },
+        'metadata': {
+            'companies_matched': companies_count,
+            'companies_used': len(company_names),
+            'company_filter_applied': len(company_names),
+            'profiles_matched': total_profiles,
+            'query_time_ms': int((time.time() - start_time) * 1000),
+            'search_mode': search_mode
+        },
+        'facets': people_service.parse_facets(results, facets)
+    }
+
+
+async def execute_sequential_count(
+    company_criteria: dict,
+    people_criteria: dict,
+    mode: str = 'exact',
+    company_sample: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Audience sizing: company → people counts without fetching any profiles
+
+    Same company stage (and company-result cache) and people query as
+    execute_sequential_search, but the people query runs with size 0.
+
+    Args:
+        company_criteria: Filters for company query
+        people_criteria: Filters for people query
+        mode: "exact" (full count) or "approximate" (counting stops at
+            settings.count_approximate_threshold)
+        company_sample: Approximate mode only - count people at a random sample
+            of this many matched companies and scale up by the sampled fraction
+
+    Returns:
+        {
+            'status': 'success',
+            'profiles_matched': 8234,
+            'profiles_relation': 'eq',   # eq | gte (lower bound) | approx (sampled)
+            'companies_matched': 547,
+            'companies_used': 547,
+            'mode': 'exact',
+            'search_mode': 'sequential',
+            'query_time_ms': 120
         }
+    """
+    start_time = time.time()
+
+    if not has_company_filters(company_criteria):
+        search_mode = 'direct'
+        company_names, companies_count, company_ids, company_set_id = [], 0, {}, None
+    else:
+        search_mode = 'sequential'
+        company_names, companies_count, company_ids, company_set_id = await resolve_company_filter(
+            company_criteria
+        )
+
+    used_names = company_names
+    sampled = False
+    if search_mode == 'sequential' and mode == 'approximate' and company_sample and len(company_names) > company_sample:
+        # Deterministic per criteria, so repeated sizing calls agree
+        rng = random.Random(criteria_hash(company_criteria))
+        used_names = sorted(rng.sample(company_names, company_sample))
+        company_ids = {name: company_ids[name] for name in used_names if name in company_ids}
+        company_set_id = None  # The sample is sent inline
+        sampled = True
+
+    if search_mode == 'sequential' and not used_names:
+        profiles_matched, relation = 0, 'eq'
+    else:
+        track_total_hits = True if mode == 'exact' else settings.count_approximate_threshold
+        try:
+            profiles_matched, relation = await people_service.count_people_at_companies_async(
+                people_criteria, used_names, company_ids, company_set_id, track_total_hits
+            )
+        except Exception as e:
+            if not company_set_id:
+                raise
+            print(f"Company set lookup failed ({company_set_id}), using inline terms: {e}")
+            profiles_matched, relation = await people_service.count_people_at_companies_async(
+                people_criteria, used_names, company_ids, None, track_total_hits
+            )
+
+    if sampled:
+        profiles_matched = round(profiles_matched * len(company_names) / len(used_names))
+        relation = 'approx' if relation == 'eq' else relation
+    elif relation == 'eq' and companies_count > len(company_names):
+        # More companies matched than the filter holds: people at the rest aren't counted
+        relation = 'gte'
+
+    return {
+        'status': 'success',
+        'profiles_matched': profiles_matched,
+        'profiles_relation': relation,
+        'companies_matched': companies_count,
+        'companies_used': len(used_names),
+        'mode': mode,
+        'search_mode': search_mode,
+        'query_time_ms': int((time.time() - start_time) * 1000)
+    }
+
+
+
+async def iter_sequential_batch(
+    searches: List[Dict[str, Any]],
+    concurrency: int
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Run many sequential searches, streaming (index, response) as each completes
+
+    Page-1 searches with identical company criteria are grouped: the group's
+    company sets are resolved (and cached) once, then all of its searches run
+    concurrently and reuse them for the company stage and planner counts. At
+    most `concurrency` searches are in flight; their concurrent people queries
+    share _msearch requests through the OpenSearch client's batcher. Searches
+    without a session token are one-shot (stateless=True: no PIT, stored
+    session or prefetch). A failed search yields an error response for its
+    index only.
+
+    Args:
+        searches: execute_sequential_search keyword arguments, one dict per search
+        concurrency: Max searches in flight
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    done = asyncio.Queue()
+
+    async def run(index: int):
+        async with semaphore:
+            try:
+                search = searches[index]
+                response = await execute_sequential_search(
+                    **search,
+                    stateless=not search.get('session_token')
+                )
+            except Exception as e:
+                print(f"Batch search {index} failed: {e}")
+                response = {'status': 'error', 'error': 'search_error', 'message': f"Search error: {str(e)}"}
+        await done.put((index, response))
+
+    def first_tier(search: Dict[str, Any]) -> int:
+        # The company tier a new search starts from (see _execute_sequential_search)
+        full = (
+            search.get('exact_total')
+            or search.get('facets_only')
+            or search.get('page', 1) > 1
+            or bool(search.get('cursor'))
+        )
+        return company_tiers(full=full)[0]
+
+    async def run_group(indices: List[int]):
+        if len(indices) > 1:
+            # Only the company stage is shared: resolve it once, not a whole search
+            company_criteria = searches[indices[0]]['company_criteria']
+            limits = sorted({first_tier(searches[index]) for index in indices})
+            async with semaphore:
+                try:
+                    await asyncio.gather(*(
+                        resolve_company_filter(company_criteria, limit) for limit in limits
+                    ))
+                except Exception as e:
+                    print(f"Batch company stage failed, searches resolve their own: {e}")
+        await asyncio.gather(*(run(index) for index in indices))
+
+    # Group by company criteria; pages 2+ (session) and direct searches have nothing to share
+    groups: Dict[Any, List[int]] = {}
+    for index, search in enumerate(searches):
+        company_criteria = search['company_criteria']
+        if search.get('session_token') or not has_company_filters(company_criteria):
+            key = ('single', index)
+        else:
+            key = criteria_hash(company_criteria)
+        groups.setdefault(key, []).append(index)
+
+    tasks = [asyncio.create_task(run_group(indices)) for indices in groups.values()]
+    try:
+        for _ in range(len(searches)):
+            yield await done.get()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _remember_key(keys: Dict[str, list], page: int, sort_values: list):
+    """
+    Record the search_after key of `page`
+
+    Only checkpoints (pages 1 + k * interval) and the newest key are kept, so
+    the session stays small however deep the user pages.
+    """
+    interval = settings.session_checkpoint_interval
+    for recorded in [p for p in keys if (int(p) - 1) % interval]:
+        del keys[recorded]
+    keys[str(page)] = sort_values
+
+
+async def _walk_keys(
+    session_state: Dict[str, Any],
+    people_criteria: dict,
+    company_names: list,
+    company_ids: dict,
+    company_set_id: str,
+    start: int,
+    target: int,
+    page_size: int
+) -> Optional[list]:
+    """
+    Walk sort values from page `start`'s key to page `target`, recording the
+    checkpoints passed on the way
+
+    Returns:
+        search_after key of `target` (past the last hit if results end
+        earlier, i.e. an empty page), or None if there are no results
+    """
+    keys = session_state['after']
+    interval = settings.session_checkpoint_interval
+    pages_per_request = max(1, settings.session_walk_max_hits // page_size)
+
+    key = keys.get(str(start))
+    page = start
+    while page < target:
+        pages = min(target - page, pages_per_request)
+        sort_values, pit_id = await people_service.fetch_sort_values(
+            people_criteria,
+            company_names,
+            pages * page_size,
+            company_ids,
+            company_set_id,
+            key,
+            session_state.get('pit')
+        )
+        if pit_id:
+            session_state['pit'] = pit_id
+
+        if len(sort_values) < pages * page_size:
+            # Results end before the target page
+            return sort_values[-1] if sort_values else key
+
+        for step in range(1, pages + 1):
+            if (page + step - 1) % interval == 0:
+                keys[str(page + step)] = sort_values[step * page_size - 1]
+
+        key = sort_values[-1]
+        page += pages
+
+    return key
+
+
+async def _page_search_after(
+    session_state: Dict[str, Any],
+    people_criteria: dict,
+    company_names: list,
+    company_ids: dict,
+    company_set_id: str,
+    page: int,
+    page_size: int
+) -> Optional[list]:
+    """search_after key for `page`: recorded, or walked from the nearest checkpoint below it"""
+    keys = session_state['after']
+    if str(page) in keys:
+        return keys[str(page)]
+
+    start = max((int(p) for p in keys if int(p) < page), default=1)
+    try:
+        key = await _walk_keys(
+            session_state, people_criteria, company_names, company_ids, company_set_id,
+            start, page, page_size
+        )
+    except Exception as e:
+        print(f"Checkpoint walk to page {page} failed, reading it by offset if in range: {e}")
+        return None
+
+    if key is not None:
+        _remember_key(keys, page, key)
+    return key
+
+
+async def _merge_checkpoints(session_state: Dict[str, Any], walked_keys: Dict[str, list]):
+    """
+    Add prefetched keys to the stored session, reloaded first
+
+    Pages may have saved newer state meanwhile (renewed PIT, widening, keys):
+    only keys it doesn't have are added, and none if the session has since
+    moved to another page size or company segment.
+    """
+    current = await session_store.session_store.get(session_state['sid'])
+    if (
+        current is None
+        or current.get('ps') != session_state.get('ps')
+        or current.get('tier') != session_state.get('tier')
+        or ('pinned' in current) != ('pinned' in session_state)
+    ):
+        return
+
+    interval = settings.session_checkpoint_interval
+    added = {
+        page: key for page, key in walked_keys.items()
+        if (int(page) - 1) % interval == 0 and page not in current['after']
     }
+    if added:
+        current['after'].update(added)
+        await save_session(current)
+
+
+# Background checkpoint prefetches in flight (session id → task)
+_prefetch_tasks: Dict[str, asyncio.Task] = {}
+
+
+def _schedule_prefetch(
+    session_state: Dict[str, Any],
+    people_criteria: dict,
+    company_names: list,
+    company_ids: dict,
+    company_set_id: str,
+    page: int,
+    page_size: int,
+    total_pages: int
+):
+    """
+    Walk checkpoints up to settings.session_prefetch_pages ahead of `page`
+
+    Starts once the user pages past page 1 (most searches stop there), and
+    only with a session store: stateless tokens can't pick up the new keys.
+    """
+    if page <= 1 or settings.session_prefetch_pages <= 0 or session_store.session_store is None:
+        return
+
+    session_id = session_state['sid']
+    if session_id in _prefetch_tasks:
+        return
+
+    interval = settings.session_checkpoint_interval
+    horizon = min(page + settings.session_prefetch_pages, total_pages, settings.max_page)
+    horizon = ((horizon - 1) // interval) * interval + 1  # Last checkpoint page within reach
+    keys = session_state['after']
+    start = max((int(p) for p in keys), default=1)
+    if horizon <= start:
+        return
+
+    async def prefetch():
+        # Walk on a copy: the request's state may be stale by the time the walk ends
+        walked = {**session_state, 'after': dict(keys)}
+        try:
+            await _walk_keys(
+                walked, people_criteria, company_names, company_ids, company_set_id,
+                start, horizon, page_size
+            )
+            await _merge_checkpoints(session_state, walked['after'])
+        except Exception as e:
+            print(f"Checkpoint prefetch failed ({session_id}): {e}")
+
+    task = asyncio.get_running_loop().create_task(prefetch())
+    _prefetch_tasks[session_id] = task
+    task.add_done_callback(lambda _: _prefetch_tasks.pop(session_id, None))
@@ -0,0 +1,206 @@
+"""
+Search Session Store
+Keeps sequential-search session state (company list, criteria hashes, totals)
+server-side so clients only round-trip a short signed session reference
+"""
+
+import json
+import zlib
+import asyncio
+import secrets
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.services.people_service import close_people_pit
+from app.utils.cache import BoundedCache
+from app.utils.session_token import (
+    encode_session_token,
+    decode_session_token,
+    generate_session_ref,
+    decode_session_ref,
+    is_session_ref,
+    TOKEN_TTL
+)
+from app.config import settings
+
+
+def _state_size(state: Dict[str, Any]) -> int:
+    """Cheap size estimate (sessions are re-saved on every page; avoid serializing 10k names)"""
+    return (
+        512
+        + sum(len(name) + 8 for name in state.get('cnames', []))
+        + 12 * len(state.get('cids') or [])
+        + 128 * len(state.get('after') or {})
+    )
+
+
+class InMemorySessionStore:
+    """
+    Per-worker LRU session store (sessions are lost on restart / not shared)
+
+    on_discard(state) is scheduled when a session is evicted, expires or is
+    deleted, to release server-side resources such as its PIT.
+    """
+
+    backend = 'memory'
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: int,
+        on_discard: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ):
+        self._on_discard = on_discard
+        self._cache = BoundedCache(
+            max_bytes=max_bytes,
+            ttl_seconds=ttl_seconds,
+            sizeof=_state_size,
+            on_evict=self._evicted
+        )
+
+    def _evicted(self, session_id: str, state: Dict[str, Any]):
+        if self._on_discard is None:
+            return
+        try:
+            asyncio.get_running_loop().create_task(self._on_discard(state))
+        except RuntimeError:
+            pass  # No loop (shutdown) - PIT keep-alive expires on its own
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(session_id)
+
+    async def put(self, session_id: str, state: Dict[str, Any], ttl: Optional[int] = None):
+        # Replacing an entry doesn't fire on_evict, so re-saving keeps the PIT open
+        self._cache.set(session_id, state, ttl=ttl)
+
+    async def delete(self, session_id: str):
+        self._cache.delete(session_id)
+
+    async def close(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': self.backend, **self._cache.stats()}
+
+
+class RedisSessionStore:
+    """
+    Redis-protocol session store shared by all workers
+
+    State is stored as zlib-compressed JSON with a TTL. Pass `client` to use an
+    existing redis.asyncio-compatible client (e.g. a local stand-in for tests).
+    """
+
+    backend = 'redis'
+
+    def __init__(self, url: str, ttl_seconds: int, key_prefix: str = 'seqsess:', client: Any = None):
+        if client is None:
+            try:
+                import redis.asyncio as redis_asyncio
+            except ImportError as e:
+                raise ImportError("SESSION_STORE=redis requires the 'redis' package") from e
+            client = redis_asyncio.from_url(url)
+
+        self._client = client
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = await self._client.get(self.key_prefix + session_id)
+        except Exception as e:
+            self.errors += 1
+            print(f"Session store read failed ({session_id}): {e}")
+            return None
+
+        if raw is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(zlib.decompress(raw))
+
+    async def put(self, session_id: str, state: Dict[str, Any], ttl: Optional[int] = None):
+        raw = zlib.compress(json.dumps(state, separators=(',', ':')).encode())
+        await self._client.set(self.key_prefix + session_id, raw, ex=ttl or self.ttl_seconds)
+
+    async def delete(self, session_id: str):
+        await self._client.delete(self.key_prefix + session_id)
+
+    async def close(self):
+        await self._client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.backend,
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+async def release_session(state: Dict[str, Any]):
+    """Free server-side resources held by a session (its people PIT)"""
+    if state.get('pit'):
+        await close_people_pit(state['pit'])
+
+
+def create_session_store() -> Optional[Any]:
+    """Store selected by settings.session_store (None = stateless tokens)"""
+    if settings.session_store == 'redis':
+        # Redis expires keys silently; PITs are bounded by their keep-alive
+        return RedisSessionStore(settings.session_redis_url, settings.session_ttl_seconds)
+    if settings.session_store == 'memory':
+        return InMemorySessionStore(
+            settings.session_store_max_bytes,
+            settings.session_ttl_seconds,
+            on_discard=release_session
+        )
+    return None
+
+# Global instance
+session_store = create_session_store()
+
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(12)
+
+
+async def save_session(state: Dict[str, Any]) -> str:
+    """
+    Persist session state and return the token handed to the client
+
+    With a store, state is saved under state['sid'] and the token is a short
+    signed reference. Without one (or if the store write fails) the whole
+    state is signed into a stateless token instead.
+    """
+    if session_store is not None:
+        try:
+            await session_store.put(state['sid'], state, ttl=TOKEN_TTL)
+            return generate_session_ref(state['sid'])
+        except Exception as e:
+            print(f"Session store write failed, falling back to stateless token: {e}")
+
+    return encode_session_token(state)
+
+
+async def load_session(token: str) -> Dict[str, Any]:
+    """
+    Resolve a session token (short reference or stateless token) to its state
+
+    Raises:
+        ValueError: If the token is invalid, expired or the session is unknown
+    """
+    if not is_session_ref(token):
+        return decode_session_token(token)
+
+    session_id = decode_session_ref(token)
+    state = await session_store.get(session_id) if session_store is not None else None
+    if state is None:
+        raise ValueError("Session expired or not found. Please restart from page 1.")
+
+    return state
@@ -0,0 +1,142 @@
+"""
+Bounded In-Process Cache
+LRU + TTL eviction with a memory budget in bytes (not entries)
+"""
+
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a JSON-like value (compact serialized length)"""
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    return len(json.dumps(value, separators=(',', ':'), default=str))
+
+
+class BoundedCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and a byte budget
+
+    - get() refreshes recency; expired entries are dropped on access
+    - set() evicts least recently used entries until the budget fits
+    - Values larger than the whole budget are not stored
+    - max_bytes <= 0 disables the cache (every get is a miss)
+    - on_evict(key, value) is called for LRU evictions, expirations and deletes
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        sizeof: Callable[[Any], int] = estimate_size,
+        on_evict: Optional[Callable[[Any, Any], None]] = None
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._sizeof = sizeof
+        self._on_evict = on_evict
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key: Any) -> tuple:
+        value, expires_at, size = self._entries.pop(key)
+        self._bytes -= size
+        return value, expires_at, size
+
+    def _notify(self, removed: list):
+        # Called outside the lock so callbacks may use the cache
+        if self._on_evict:
+            for key, value in removed:
+                self._on_evict(key, value)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        removed = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                removed.append((key, value))
+                value = default
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+        self._notify(removed)
+        return value
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None, size: Optional[int] = None):
+        if self.max_bytes <= 0:
+            return
+
+        size = self._sizeof(value) if size is None else size
+        if size > self.max_bytes:
+            return
+
+        expires_at = time.monotonic() + (self.ttl_seconds if ttl is None else ttl)
+        removed = []
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                old_key, (old_value, _, _) = next(iter(self._entries.items()))
+                self._remove(old_key)
+                self.evictions += 1
+                removed.append((old_key, old_value))
+
+        self._notify(removed)
+
+    def delete(self, key: Any) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            value, _, _ = self._remove(key)
+
+        self._notify([(key, value)])
+        return True
+
+    def clear(self):
+        with self._lock:
+            removed = [(key, entry[0]) for key, entry in self._entries.items()]
+            self._entries.clear()
+            self._bytes = 0
+
+        self._notify(removed)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
@@ -0,0 +1,240 @@
+"""
+Persistent Profile Store
+On-disk read-through tier (SQLite + zlib) that survives cold starts and restarts
+
+Sits between the in-process profile cache and OpenSearch. Documents are
+stored compressed with their lastUpdated stamp; an older document never
+overwrites a newer one (safe to preload from a stale dump).
+
+Preload from an NDJSON dump (one profile per line):
+    python -m app.utils.disk_cache /tmp/profile_cache.db profiles.ndjson
+"""
+
+import json
+import sys
+import time
+import zlib
+import sqlite3
+import threading
+from typing import Optional, List, Dict, Any, Iterable
+
+
+class DiskProfileStore:
+    """
+    Size-capped, TTL-bounded profile document store
+
+    - Keyed by publicId, values are zlib-compressed JSON
+    - Least recently read documents are dropped once the store exceeds max_bytes
+    - Documents older than ttl_seconds count as misses
+    - Blocking I/O: call from a worker thread in async code
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttl_seconds: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS profiles (
+                public_id TEXT PRIMARY KEY,
+                doc BLOB NOT NULL,
+                last_updated TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS profiles_accessed ON profiles (accessed_at)")
+        self._conn.commit()
+
+        # Running totals (one scan at open; kept current by put_many/evictions)
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM profiles"
+        ).fetchone()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, public_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Return {publicId: profile} for fresh stored documents"""
+        if not public_ids:
+            return {}
+
+        now = time.time()
+        oldest = now - self.ttl_seconds
+        found = {}
+
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(public_ids), 500):
+                chunk = public_ids[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT public_id, doc FROM profiles WHERE public_id IN ({placeholders}) AND stored_at >= ?",
+                    (*chunk, oldest)
+                ).fetchall()
+
+                for public_id, doc in rows:
+                    found[public_id] = json.loads(zlib.decompress(doc))
+
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE profiles SET accessed_at = ? WHERE public_id IN ({','.join('?' * len(rows))})",
+                        (now, *[row[0] for row in rows])
+                    )
+
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(public_ids) - len(found)
+
+        return found
+
+    def get(self, public_id: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([public_id]).get(public_id)
+
+    def put_many(self, profiles: Iterable[Dict[str, Any]]) -> int:
+        """
+        Store profiles (keyed by their publicId)
+
+        A stored document with a newer lastUpdated is kept.
+
+        Returns:
+            Number of documents written
+        """
+        now = time.time()
+        rows = []
+        for profile in profiles:
+            public_id = profile.get('publicId')
+            if not public_id:
+                continue
+            doc = zlib.compress(json.dumps(profile, separators=(',', ':')).encode())
+            rows.append((public_id, doc, profile.get('lastUpdated'), now, now, len(doc)))
+
+        if not rows:
+            return 0
+
+        with self._lock:
+            public_ids = list({row[0] for row in rows})
+            before = self._stored_sizes(public_ids)
+            cursor = self._conn.executemany("""
+                INSERT INTO profiles (public_id, doc, last_updated, stored_at, accessed_at, size)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (public_id) DO UPDATE SET
+                    doc = excluded.doc,
+                    last_updated = excluded.last_updated,
+                    stored_at = excluded.stored_at,
+                    size = excluded.size
+                WHERE profiles.last_updated IS NULL
+                   OR excluded.last_updated IS NOT NULL AND excluded.last_updated >= profiles.last_updated
+            """, rows)
+            written = cursor.rowcount
+            after = self._stored_sizes(public_ids)
+            self._entries += len(after) - len(before)
+            self._bytes += sum(after.values()) - sum(before.values())
+            self._enforce_size_cap()
+            self._conn.commit()
+
+        return written
+
+    def put(self, profile: Dict[str, Any]):
+        self.put_many([profile])
+
+    def preload_ndjson(self, path: str, batch_size: int = 1000) -> int:
+        """Bulk load profiles from an NDJSON dump; returns documents written"""
+        written = 0
+        batch = []
+
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                batch.append(json.loads(line))
+                if len(batch) >= batch_size:
+                    written += self.put_many(batch)
+                    batch = []
+
+        if batch:
+            written += self.put_many(batch)
+
+        return written
+
+    def _stored_sizes(self, public_ids: List[str]) -> Dict[str, int]:
+        """{publicId: stored size} for the given ids (primary-key lookups)"""
+        sizes = {}
+        for i in range(0, len(public_ids), 500):
+            chunk = public_ids[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            sizes.update(self._conn.execute(
+                f"SELECT public_id, size FROM profiles WHERE public_id IN ({placeholders})",
+                chunk
+            ).fetchall())
+        return sizes
+
+    def _enforce_size_cap(self):
+        """Drop least recently read documents until the store is under 90% of max_bytes"""
+        if self._bytes <= self.max_bytes:
+            return
+
+        # Resync before evicting (other workers may share the file); eviction scans anyway
+        self._entries, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM profiles"
+        ).fetchone()
+        self._bytes = total
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT public_id, size FROM profiles ORDER BY accessed_at")
+
+        doomed = []
+        for public_id, size in rows:
+            if total <= target:
+                break
+            doomed.append((public_id,))
+            total -= size
+
+        self._conn.executemany("DELETE FROM profiles WHERE public_id = ?", doomed)
+        self.evictions += len(doomed)
+        self._entries -= len(doomed)
+        self._bytes = total
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'entries': self._entries,
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    # Bulk preload: python -m app.utils.disk_cache <db_path> <dump.ndjson>
+    from app.config import settings
+
+    if len(sys.argv) != 3:
+        print("Usage: python -m app.utils.disk_cache <db_path> <dump.ndjson>")
+        sys.exit(1)
+
+    store = DiskProfileStore(
+        sys.argv[1],
+        max_bytes=settings.profile_disk_cache_max_bytes,
+        ttl_seconds=settings.profile_disk_cache_ttl_seconds
+    )
+    start = time.time()
+    count = store.preload_ndjson(sys.argv[2])
+    print(f"✅ Preloaded {count:,} profiles in {time.time() - start:.1f}s")
+    print(json.dumps(store.stats(), indent=2))
+    store.close()
@@ -8,62 +8,323 @@ import base64
 import hmac
 import hashlib
 import time
-from typing import List, Dict, Any
+import zlib
+import struct
+from typing import List, Dict, Any, Tuple
+from app.config import settings
 
-# Secret key for HMAC signing (in production, use environment variable)
-SECRET_KEY = "your-secret-key-change-in-production-use-env-var"
-TOKEN_TTL = 3600  # 1 hour
+# Secret key for HMAC signing (SESSION_TOKEN_SECRET)
+SECRET_KEY = settings.session_token_secret
+TOKEN_TTL = settings.session_ttl_seconds
 
-def generate_session_token(
+# Prefix of short tokens that reference server-side session state
+SESSION_REF_PREFIX = "s"
+
+# v2 binary token: "2.<base64url(header + zlib body)>.<base64url(HMAC-SHA256)>"
+# header: version, flags, iat, exp, company criteria md5, people criteria md5
+V2_PREFIX = "2"
+V2_HEADER = struct.Struct('>BBII16s16s')
+V2_FLAG_IDS = 0x01  # body carries company ids
+
+def normalize_criteria(criteria: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Canonical form of search criteria
+
+    Drops empty values and sorts list values, so equivalent criteria
+    (e.g. the same industries in a different order) normalize identically.
+    """
+    normalized = {}
+    for key, value in criteria.items():
+        if value is None or value == [] or value == '':
+            continue
+        normalized[key] = sorted(value, key=str) if isinstance(value, list) else value
+    return normalized
+
+def criteria_hash(criteria: Dict[str, Any]) -> str:
+    """md5 of the canonical criteria JSON (cache and token key)"""
+    return hashlib.md5(json.dumps(normalize_criteria(criteria), sort_keys=True).encode()).hexdigest()
+
+def _sign(data: str) -> str:
+    return hmac.new(SECRET_KEY.encode(), data.encode(), hashlib.sha256).hexdigest()
+
+def build_session_payload(
     company_names: List[str],
     company_criteria: Dict[str, Any],
     people_criteria: Dict[str, Any],
-    search_id: str = None
-) -> str:
+    search_id: str = None,
+    company_ids: Dict[str, int] = None,
+    company_set_id: str = None
+) -> Dict[str, Any]:
     """
-    Generate secure session token containing company filter
+    Session state for a sequential search (token payload or stored session)
 
     Args:
         company_names: List of company names used in filter
         company_criteria: Original company search criteria
         people_criteria: Original people search criteria
-        search_id: Unique search identifier for analytics
+        search_id: Unique search identifier (session id for stored sessions)
+        company_ids: Optional {company_name: memberId} (id-based people filter)
+        company_set_id: Optional stored company set id (terms-lookup people filter)
 
     Returns:
-        Base64-encoded signed token
+        Payload dict (v, cnames, ch, ph, iat, exp, sid, optional cids/csid)
     """
     current_time = int(time.time())
 
     payload = {
         "v": 1,  # Token version
-        "cnames": company_names,  # Company names
-        "ch": hashlib.md5(json.dumps(company_criteria, sort_keys=True).encode()).hexdigest(),
-        "ph": hashlib.md5(json.dumps(people_criteria, sort_keys=True).encode()).hexdigest(),
+        "ch": criteria_hash(company_criteria),
+        "ph": criteria_hash(people_criteria),
         "iat": current_time,  # Issued at
         "exp": current_time + TOKEN_TTL,  # Expires
         "sid": search_id or f"search_{current_time}"  # Search ID
     }
 
+    set_session_companies(payload, company_names, company_ids, company_set_id)
+
+    return payload
+
+def set_session_companies(
+    payload: Dict[str, Any],
+    company_names: List[str],
+    company_ids: Dict[str, int] = None,
+    company_set_id: str = None
+):
+    """(Re)pin the company filter of a session payload (cnames, optional cids/csid)"""
+    payload["cnames"] = company_names
+    payload.pop("cids", None)
+    payload.pop("csid", None)
+
+    if company_ids:
+        # Parallel to cnames (None = no id, matched by name)
+        payload["cids"] = [company_ids.get(name) for name in company_names]
+
+    if company_set_id:
+        payload["csid"] = company_set_id
+
+def encode_session_token(payload: Dict[str, Any], version: int = None) -> str:
+    """
+    Sign a session payload into a stateless token
+
+    Args:
+        payload: Session payload (build_session_payload)
+        version: 1 (JSON, payload_b64.signature) or 2 (compact binary);
+            defaults to settings.session_token_version
+    """
+    if (version or settings.session_token_version) == 2 and _v2_encodable(payload):
+        return encode_session_token_v2(payload)
+
     # Serialize and encode
     payload_json = json.dumps(payload, separators=(',', ':'))
     payload_b64 = base64.urlsafe_b64encode(payload_json.encode()).decode()
 
-    # Sign with HMAC
-    signature = hmac.new(
-        SECRET_KEY.encode(),
-        payload_b64.encode(),
-        hashlib.sha256
-    ).hexdigest()
-
     # Combine: payload.signature
-    token = f"{payload_b64}.{signature}"
+    return f"{payload_b64}.{_sign(payload_b64)}"
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def _write_bytes(out: bytearray, value: bytes):
+    _write_varint(out, len(value))
+    out += value
+
+def _read_bytes(data: bytes, pos: int) -> Tuple[bytes, int]:
+    length, pos = _read_varint(data, pos)
+    return data[pos:pos + length], pos + length
+
+def _pack_v2_body(payload: Dict[str, Any]) -> bytes:
+    """
+    Binary company section + JSON extras
+
+    - Companies with an id: sorted by id, ids delta-encoded as varints
+    - Names: NUL-separated, id-ordered names first, then the id-less names sorted
+      (sorted neighbours share prefixes, which zlib collapses)
+    - Remaining payload keys (sid, csid, totals...) as compact JSON
+    """
+    names = payload.get('cnames', [])
+    ids = payload.get('cids') or [None] * len(names)
+
+    with_id = sorted(
+        ((company_id, name) for name, company_id in zip(names, ids) if company_id is not None),
+        key=lambda pair: pair[0]
+    )
+    without_id = sorted(name for name, company_id in zip(names, ids) if company_id is None)
+
+    out = bytearray()
+
+    _write_varint(out, len(with_id))
+    previous = 0
+    for company_id, _ in with_id:
+        _write_varint(out, company_id - previous)
+        previous = company_id
+
+    ordered_names = [name for _, name in with_id] + without_id
+    _write_varint(out, len(ordered_names))
+    _write_bytes(out, '\x00'.join(ordered_names).encode())
+
+    extras = {
+        key: value for key, value in payload.items()
+        if key not in ('v', 'cnames', 'cids', 'ch', 'ph', 'iat', 'exp')
+    }
+    _write_bytes(out, json.dumps(extras, separators=(',', ':')).encode())
+
+    return zlib.compress(bytes(out), 6)
 
-    return token
+def _unpack_v2_body(body: bytes, has_ids: bool) -> Dict[str, Any]:
+    data = zlib.decompress(body)
+    pos = 0
+
+    count, pos = _read_varint(data, pos)
+    ids = []
+    previous = 0
+    for _ in range(count):
+        delta, pos = _read_varint(data, pos)
+        previous += delta
+        ids.append(previous)
+
+    total, pos = _read_varint(data, pos)
+    joined, pos = _read_bytes(data, pos)
+    names = joined.decode().split('\x00') if total else []
+
+    extras, pos = _read_bytes(data, pos)
+    payload = json.loads(extras)
+    payload['cnames'] = names
+    if has_ids:
+        payload['cids'] = ids + [None] * (len(names) - len(ids))
+    return payload
+
+def _v2_encodable(payload: Dict[str, Any]) -> bool:
+    """v2 needs unsigned integer ids and NUL-free names (anything else stays on v1)"""
+    return all(
+        company_id is None or (isinstance(company_id, int) and company_id >= 0)
+        for company_id in payload.get('cids') or []
+    ) and not any('\x00' in name for name in payload.get('cnames', []))
+
+def encode_session_token_v2(payload: Dict[str, Any]) -> str:
+    """Sign a session payload into a compact binary v2 token"""
+    has_ids = any(company_id is not None for company_id in payload.get('cids') or [])
+    header = V2_HEADER.pack(
+        2,
+        V2_FLAG_IDS if has_ids else 0,
+        payload['iat'],
+        payload['exp'],
+        bytes.fromhex(payload['ch']),
+        bytes.fromhex(payload['ph'])
+    )
+    body = f"{V2_PREFIX}.{_b64encode(header + _pack_v2_body(payload))}"
+    signature = hmac.new(SECRET_KEY.encode(), body.encode(), hashlib.sha256).digest()
+    return f"{body}.{_b64encode(signature)}"
+
+def _decode_session_token_v2(token: str) -> Dict[str, Any]:
+    parts = token.split('.')
+    if len(parts) != 3:
+        raise ValueError("Invalid token format")
+
+    body = f"{parts[0]}.{parts[1]}"
+    expected_signature = hmac.new(SECRET_KEY.encode(), body.encode(), hashlib.sha256).digest()
+    if not hmac.compare_digest(_b64decode(parts[2]), expected_signature):
+        raise ValueError("Invalid token signature - token may have been tampered with")
+
+    data = _b64decode(parts[1])
+    version, flags, issued_at, expires_at, company_hash, people_hash = V2_HEADER.unpack_from(data)
+    if version != 2:
+        raise ValueError(f"Unsupported token version {version}")
+
+    payload = _unpack_v2_body(data[V2_HEADER.size:], bool(flags & V2_FLAG_IDS))
+    payload.update({
+        'v': 2,
+        'ch': company_hash.hex(),
+        'ph': people_hash.hex(),
+        'iat': issued_at,
+        'exp': expires_at
+    })
+    return payload
+
+def generate_session_token(
+    company_names: List[str],
+    company_criteria: Dict[str, Any],
+    people_criteria: Dict[str, Any],
+    search_id: str = None,
+    company_ids: Dict[str, int] = None,
+    company_set_id: str = None
+) -> str:
+    """
+    Generate secure session token containing company filter
+
+    Args:
+        company_names: List of company names used in filter
+        company_criteria: Original company search criteria
+        people_criteria: Original people search criteria
+        search_id: Unique search identifier for analytics
+        company_ids: Optional {company_name: memberId} (id-based people filter)
+        company_set_id: Optional stored company set id (terms-lookup people filter)
+
+    Returns:
+        Base64-encoded signed token
+    """
+    return encode_session_token(build_session_payload(
+        company_names,
+        company_criteria,
+        people_criteria,
+        search_id=search_id,
+        company_ids=company_ids,
+        company_set_id=company_set_id
+    ))
+
+def generate_session_ref(session_id: str) -> str:
+    """
+    Short signed reference to server-side session state
+
+    Format: s.<session_id>.<signature> (signature = first 32 hex chars of HMAC-SHA256)
+    """
+    body = f"{SESSION_REF_PREFIX}.{session_id}"
+    return f"{body}.{_sign(body)[:32]}"
+
+def is_session_ref(token: str) -> bool:
+    return token.startswith(f"{SESSION_REF_PREFIX}.")
+
+def decode_session_ref(token: str) -> str:
+    """
+    Verify a session reference and return its session id
+
+    Raises:
+        ValueError: If the reference is malformed or tampered
+    """
+    parts = token.split('.')
+    if len(parts) != 3 or parts[0] != SESSION_REF_PREFIX or not parts[1]:
+        raise ValueError("Invalid session token: Invalid token format")
+
+    body = f"{parts[0]}.{parts[1]}"
+    if not hmac.compare_digest(parts[2], _sign(body)[:32]):
+        raise ValueError("Invalid session token: Invalid token signature - token may have been tampered with")
+
+    return parts[1]
 
 def decode_session_token(token: str) -> Dict[str, Any]:
     """
     Decode and validate session token
 
+    Accepts v1 (JSON) and v2 (binary) tokens.
+
     Args:
         token: Session token from previous request
 
@@ -74,26 +335,25 @@ def decode_session_token(token: str) -> Dict[str, Any]:
         ValueError: If token invalid, expired, or tampered
     """
     try:
-        # Split token
-        parts = token.split('.')
-        if len(parts) != 2:
-            raise ValueError("Invalid token format")
+        if token.startswith(f"{V2_PREFIX}."):
+            payload = _decode_session_token_v2(token)
+        else:
+            # Split token
+            parts = token.split('.')
+            if len(parts) != 2:
+                raise ValueError("Invalid token format")
 
-        payload_b64, signature = parts
+            payload_b64, signature = parts
 
-        # Verify signature
-        expected_signature = hmac.new(
-            SECRET_KEY.encode(),
-            payload_b64.encode(),
-            hashlib.sha256
-        ).hexdigest()
+            # Verify signature
+            expected_signature = _sign(payload_b64)
 
-        if not hmac.compare_digest(signature, expected_signature):
-            raise ValueError("Invalid token signature - token may have been tampered with")
+            if not hmac.compare_digest(signature, expected_signature):
+                raise ValueError("Invalid token signature - token may have been tampered with")
 
-        # Decode payload
-        payload_json = base64.urlsafe_b64decode(payload_b64.encode()).decode()
-        payload = json.loads(payload_json)
+            # Decode payload
+            payload_json = base64.urlsafe_b64decode(payload_b64.encode()).decode()
+            payload = json.loads(payload_json)
 
         # Check expiry
         current_time = int(time.time())
@@ -115,10 +375,18 @@ def validate_token_matches_criteria(
 
     Returns True if criteria haven't changed, False otherwise
     """
-    current_company_hash = hashlib.md5(json.dumps(company_criteria, sort_keys=True).encode()).hexdigest()
-    current_people_hash = hashlib.md5(json.dumps(people_criteria, sort_keys=True).encode()).hexdigest()
+    current_company_hash = criteria_hash(company_criteria)
+    current_people_hash = criteria_hash(people_criteria)
 
     return (
         token_payload.get('ch') == current_company_hash and
         token_payload.get('ph') == current_people_hash
     )
+
+def token_company_ids(token_payload: Dict[str, Any]) -> Dict[str, int]:
+    """Rebuild {company_name: memberId} from a decoded token (empty if not id-based)"""
+    return {
+        name: company_id
+        for name, company_id in zip(token_payload.get('cnames', []), token_payload.get('cids', []))
+        if company_id is not None
+    }
@@ -0,0 +1,55 @@
+"""
+Single-Flight Request Coalescing
+Concurrent calls with the same key share one execution and its result
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical async calls
+
+    The first caller for a key starts fn() in its own task; callers arriving
+    while it is in flight await the same task. Nothing is kept once the call
+    completes (this is not a cache). Exceptions are shared with every waiter.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.get_running_loop().create_task(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+
+        # Shield: a cancelled caller (even the first) must not cancel the shared call
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark retrieved so a failure nobody awaited doesn't log "exception never retrieved"
+            task.exception()
+
+    @property
+    def coalesced(self) -> int:
+        return self.calls - self.executions
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'coalescing_ratio': round(self.coalesced / self.calls, 4) if self.calls else 0.0,
+            'in_flight': len(self._in_flight)
+        }
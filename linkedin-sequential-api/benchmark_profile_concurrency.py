@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Regression benchmark: sequential search latency while profile lookups are in flight
+
+Measures /v1/search/sequential latency on its own, then again while a burst of
+/v1/profiles/{publicId} lookups is running against the same worker.
+If the profile endpoints block the event loop, the second run degrades sharply.
+
+Usage (caches and coalescing off, so every request reaches OpenSearch):
+    RESPONSE_CACHE_MAX_BYTES=0 PROFILE_CACHE_MAX_BYTES=0 REQUEST_COALESCING_ENABLED=false \
+        uvicorn app.main:app --port 8000     # start a single worker
+    python benchmark_profile_concurrency.py [base_url] [public_id]
+
+public_id must exist: the run fails if profile lookups don't return 200, or
+if the worker still answers from a cache or coalesces requests (/v1/metrics).
+"""
+
+import sys
+import time
+import asyncio
+import statistics
+import httpx
+
+BASE_URL = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8000"
+PUBLIC_ID = sys.argv[2] if len(sys.argv) > 2 else "john-smith-12345"
+
+SEARCH_REQUESTS = 20       # Concurrent sequential searches per run
+PROFILE_REQUESTS = 50      # Concurrent profile lookups in the loaded run
+MAX_SLOWDOWN = 1.5         # Fail if loaded p50 > 1.5x baseline p50
+
+SEARCH_BODY = {
+    "company_criteria": {
+        "industry": ["Technology"],
+        "size": ["11_50", "51_200"]
+    },
+    "people_criteria": {
+        "job_title": ["Engineer"],
+        "location": ["San Francisco"]
+    },
+    "page": 1,
+    "page_size": 10
+}
+
+async def timed_search(client: httpx.AsyncClient) -> float:
+    """Run one sequential search and return its latency in ms"""
+    start = time.perf_counter()
+    response = await client.post("/v1/search/sequential", json=SEARCH_BODY)
+    response.raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+async def profile_lookup(client: httpx.AsyncClient) -> int:
+    """Fire one profile lookup and return its status code"""
+    response = await client.get(f"/v1/profiles/{PUBLIC_ID}")
+    return response.status_code
+
+async def run_searches(client: httpx.AsyncClient) -> list:
+    return await asyncio.gather(*[timed_search(client) for _ in range(SEARCH_REQUESTS)])
+
+def cache_settings_to_fix(metrics: dict) -> list:
+    """Settings that let the worker answer the benchmark's repeated requests from cache"""
+    fixes = []
+    if metrics["search_response_cache"]["max_bytes"] > 0:
+        fixes.append("RESPONSE_CACHE_MAX_BYTES=0")
+    if metrics["profile_cache"]["max_bytes"] > 0:
+        fixes.append("PROFILE_CACHE_MAX_BYTES=0")
+    if metrics["profile_disk_cache"] is not None:
+        fixes.append("PROFILE_DISK_CACHE_PATH unset")
+    return fixes
+
+def flight_calls(metrics: dict) -> int:
+    """Requests that went through coalescing (stays flat when it is disabled)"""
+    return metrics["sequential_search_flight"]["calls"] + metrics["profile_flight"]["calls"]
+
+def summarize(label: str, latencies: list) -> float:
+    p50 = statistics.median(latencies)
+    p95 = sorted(latencies)[int(len(latencies) * 0.95) - 1]
+    print(f"  {label:<28} p50={p50:7.1f}ms  p95={p95:7.1f}ms")
+    return p50
+
+async def main() -> int:
+    print("=" * 60)
+    print("Benchmark: /v1/search/sequential under profile lookup load")
+    print("=" * 60)
+    print(f"  Target: {BASE_URL}")
+    print()
+
+    limits = httpx.Limits(max_connections=SEARCH_REQUESTS + PROFILE_REQUESTS)
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=60, limits=limits) as client:
+        before = (await client.get("/v1/metrics")).json()
+        fixes = cache_settings_to_fix(before)
+        if fixes:
+            print(f"❌ INVALID RUN: repeated requests would be answered from cache - start the worker with {', '.join(fixes)}")
+            return 1
+
+        # Warm up connection pools
+        await timed_search(client)
+
+        baseline = await run_searches(client)
+
+        profile_tasks = [asyncio.create_task(profile_lookup(client)) for _ in range(PROFILE_REQUESTS)]
+        loaded = await run_searches(client)
+        profile_statuses = await asyncio.gather(*profile_tasks, return_exceptions=True)
+
+        after = (await client.get("/v1/metrics")).json()
+
+    baseline_p50 = summarize("searches only", baseline)
+    loaded_p50 = summarize("searches + profile lookups", loaded)
+
+    failed_lookups = [status for status in profile_statuses if status != 200]
+    if failed_lookups:
+        print()
+        print(f"❌ INVALID RUN: {len(failed_lookups)}/{PROFILE_REQUESTS} profile lookups didn't return 200 "
+              f"(e.g. {failed_lookups[0]!r}) - no profile load was applied")
+        return 1
+
+    if flight_calls(after) != flight_calls(before):
+        print()
+        print("❌ INVALID RUN: requests were coalesced - start the worker with REQUEST_COALESCING_ENABLED=false")
+        return 1
+
+    slowdown = loaded_p50 / baseline_p50
+    print()
+    print(f"  Slowdown: {slowdown:.2f}x (limit {MAX_SLOWDOWN}x)")
+    print("=" * 60)
+
+    if slowdown > MAX_SLOWDOWN:
+        print("❌ REGRESSION: profile lookups are stalling concurrent searches")
+        return 1
+
+    print("✅ PASSED: search latency stays flat under profile load")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark: stateless session token size and encode/decode time, v1 vs v2
+
+v1 = JSON + base64 of the raw company list
+v2 = binary header + delta-encoded ids + sorted, NUL-joined names, zlib compressed
+
+Usage:
+    python benchmark_session_token.py [repeats]
+"""
+
+import sys
+import time
+import random
+import statistics
+
+from app.utils.session_token import (
+    build_session_payload,
+    encode_session_token,
+    decode_session_token
+)
+
+REPEATS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+COMPANY_COUNTS = [100, 1000, 10000]
+ID_RATIO = 0.8  # Share of companies with a memberId (rest are matched by name)
+
+COMPANY_CRITERIA = {"industry": ["Technology"], "size": ["11_50", "51_200"]}
+PEOPLE_CRITERIA = {"job_title": ["Engineer"]}
+
+WORDS = ["Global", "Data", "Systems", "Labs", "Cloud", "Health", "Capital", "Networks",
+         "Solutions", "Analytics", "Robotics", "Energy", "Media", "Bio", "Software"]
+
+
+def make_payload(count: int) -> dict:
+    rng = random.Random(count)
+    names = [
+        f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"
+        for i in range(count)
+    ]
+    ids = {
+        name: rng.randint(1, 90_000_000)
+        for name in names[:int(count * ID_RATIO)]
+    }
+    payload = build_session_payload(names, COMPANY_CRITERIA, PEOPLE_CRITERIA, company_ids=ids)
+    payload['cc'] = count
+    payload['pt'] = count * 37
+    return payload
+
+
+def timed(fn, *args) -> float:
+    """Median milliseconds over REPEATS runs"""
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    print(f"{'companies':>10} {'ver':>4} {'bytes':>10} {'encode ms':>10} {'decode ms':>10}")
+
+    for count in COMPANY_COUNTS:
+        payload = make_payload(count)
+        for version in (1, 2):
+            token = encode_session_token(payload, version=version)
+            encode_ms = timed(encode_session_token, payload, version)
+            decode_ms = timed(decode_session_token, token)
+            print(f"{count:>10,} {'v' + str(version):>4} {len(token):>10,} {encode_ms:>10.3f} {decode_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""
+Unit test setup: import the app package from the project root
+
+The OpenSearch client reads AWS credentials at import time; placeholder
+values are enough since these tests never reach OpenSearch.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'test')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'test')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
@@ -0,0 +1,136 @@
+"""
+Persistent profile store tests against a temporary SQLite file
+"""
+
+import json
+import pytest
+
+from app.utils import disk_cache
+from app.utils.disk_cache import DiskProfileStore
+
+
+def profile(public_id, last_updated=None, **fields):
+    document = {'publicId': public_id, 'fullName': f'Name {public_id}', **fields}
+    if last_updated:
+        document['lastUpdated'] = last_updated
+    return document
+
+
+def stored_totals(store):
+    """(entries, bytes) straight from the table"""
+    return tuple(store._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM profiles").fetchone())
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    stores = []
+
+    def make(max_bytes=10 * 1024 * 1024, ttl_seconds=3600):
+        store = DiskProfileStore(str(tmp_path / 'profiles.db'), max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def test_round_trip(make_store):
+    store = make_store()
+    documents = [profile('a', skills=['python']), profile('b')]
+
+    assert store.put_many(documents) == 2
+    assert store.get_many(['a', 'b', 'missing']) == {'a': documents[0], 'b': documents[1]}
+    assert store.get('missing') is None
+
+    stats = store.stats()
+    assert (stats['hits'], stats['misses']) == (2, 2)
+    assert (stats['entries'], stats['bytes']) == stored_totals(store)
+
+
+def test_documents_persist_across_reopen(make_store):
+    make_store().put(profile('a'))
+
+    reopened = make_store()
+    assert reopened.get('a') == profile('a')
+    assert (reopened.stats()['entries'], reopened.stats()['bytes']) == stored_totals(reopened)
+
+
+def test_ttl_expiry(make_store, monkeypatch):
+    store = make_store(ttl_seconds=60)
+    now = [1000.0]
+    monkeypatch.setattr(disk_cache.time, 'time', lambda: now[0])
+
+    store.put(profile('a'))
+    now[0] += 59
+    assert store.get('a') is not None
+
+    now[0] += 2
+    assert store.get('a') is None
+
+
+def test_newer_document_is_kept(make_store):
+    store = make_store()
+    store.put(profile('a', '2024-06-01', headline='newer'))
+
+    assert store.put_many([profile('a', '2024-01-01', headline='older')]) == 0
+    assert store.get('a')['headline'] == 'newer'
+
+    store.put(profile('a', '2024-07-01', headline='newest'))
+    assert store.get('a')['headline'] == 'newest'
+    assert (store.stats()['entries'], store.stats()['bytes']) == stored_totals(store)
+
+
+def test_undated_document_is_replaced(make_store):
+    store = make_store()
+    store.put(profile('a', headline='undated'))
+    store.put(profile('a', '2024-01-01', headline='dated'))
+
+    assert store.get('a')['headline'] == 'dated'
+    assert store.stats()['entries'] == 1
+
+
+def test_size_cap_evicts_least_recently_read(make_store, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(disk_cache.time, 'time', lambda: now[0])
+
+    store = make_store()
+    padding = 'x' * 2000  # Incompressible enough to keep sizes predictable
+    documents = [profile(f'p{i}', bio=f'{i}-{padding}-{i * 7919}') for i in range(10)]
+    for document in documents:
+        now[0] += 1
+        store.put(document)
+
+    entries, total = stored_totals(store)
+    assert (store.stats()['entries'], store.stats()['bytes']) == (entries, total)
+
+    # Read p0 so it is the most recently used, then shrink the budget
+    now[0] += 1
+    store.get('p0')
+    store.max_bytes = total // 2
+    now[0] += 1
+    store.put(profile('new'))
+
+    stats = store.stats()
+    assert stats['evictions'] > 0
+    assert stats['bytes'] <= store.max_bytes
+    assert (stats['entries'], stats['bytes']) == stored_totals(store)
+    assert store.get('p0') is not None
+    assert store.get('new') is not None
+    assert store.get('p1') is None  # Least recently read goes first
+
+
+def test_preload_ndjson(make_store, tmp_path):
+    dump = tmp_path / 'profiles.ndjson'
+    lines = [json.dumps(profile(f'p{i}', '2024-01-01')) for i in range(25)]
+    dump.write_text('\n'.join(lines[:10]) + '\n\n' + '\n'.join(lines[10:]) + '\n')
+
+    store = make_store()
+    assert store.preload_ndjson(str(dump), batch_size=10) == 25
+    assert len(store.get_many([f'p{i}' for i in range(25)])) == 25
+    assert (store.stats()['entries'], store.stats()['bytes']) == stored_totals(store)
+
+    # Reloading the same dump rewrites equal-dated documents without growing the store
+    assert store.preload_ndjson(str(dump)) == 25
+    assert store.stats()['entries'] == 25
+    assert (store.stats()['entries'], store.stats()['bytes']) == stored_totals(store)
@@ -0,0 +1,65 @@
+"""
+People PIT handling: only a missing / expired PIT triggers a reopen, and a
+PIT that can't be opened isn't retried on every search
+"""
+
+import asyncio
+import pytest
+from opensearchpy.exceptions import (
+    NotFoundError,
+    RequestError,
+    ConnectionTimeout,
+    TransportError
+)
+
+from app.config import settings
+from app.services import people_service
+from app.services.opensearch_client import OpenSearchClient
+from app.services.people_service import is_pit_missing_error
+
+
+@pytest.mark.parametrize('error', [
+    NotFoundError(404, 'search_phase_execution_exception',
+                  {'error': {'root_cause': [{'type': 'search_context_missing_exception'}]}}),
+    TransportError(400, 'illegal_argument_exception', {'error': {'reason': 'No search context found for id [42]'}}),
+])
+def test_missing_pit_errors(error):
+    assert is_pit_missing_error(error)
+
+
+@pytest.mark.parametrize('error', [
+    RequestError(400, 'parsing_exception', {'error': {'reason': 'unknown query [termz]'}}),
+    ConnectionTimeout('TIMEOUT', 'timed out', None),
+    TransportError(503, 'unavailable', {}),
+    ValueError('not an OpenSearch error'),
+])
+def test_other_errors_are_not_pit_errors(error):
+    assert not is_pit_missing_error(error)
+
+
+def test_errors_mentioning_a_pit_are_not_enough():
+    error = RequestError(400, 'illegal_argument_exception', {'error': {'reason': 'point in time keep_alive is too large'}})
+    assert not is_pit_missing_error(error)
+
+
+def test_failed_pit_open_is_not_retried_right_away(monkeypatch):
+    calls = []
+
+    class NoPitClient:
+        async def create_point_in_time(self, **kwargs):
+            calls.append(kwargs)
+            raise TransportError(400, 'illegal_argument_exception', 'PIT not supported')
+
+    now = [1000.0]
+    monkeypatch.setattr(OpenSearchClient, 'async_client', property(lambda self: NoPitClient()))
+    monkeypatch.setattr(people_service.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(people_service, '_pit_unavailable_until', 0.0)
+    monkeypatch.setattr(settings, 'people_pit_retry_seconds', 300)
+
+    assert asyncio.run(people_service.open_people_pit()) is None
+    assert asyncio.run(people_service.open_people_pit()) is None
+    assert len(calls) == 1
+
+    now[0] += 301
+    assert asyncio.run(people_service.open_people_pit()) is None
+    assert len(calls) == 2
@@ -0,0 +1,71 @@
+"""
+Batch profile lookups: ids stored in more than one index must not crowd
+other ids out of the multi-index search
+"""
+
+import asyncio
+
+from app.config import settings
+from app.services import profile_service
+from app.services.opensearch_client import OpenSearchClient
+from app.services.profile_router import profile_router
+
+
+class FakeProfileClient:
+    """msearch stand-in over per-index documents, honouring size and collapse"""
+
+    def __init__(self, indices):
+        self.indices = indices
+        self.queries = []
+
+    async def msearch(self, body):
+        responses = []
+        for header, query in zip(body[::2], body[1::2]):
+            self.queries.append((header['index'], query))
+            wanted = set(query['query']['terms']['publicId.keyword'])
+            hits = [
+                {'_index': index, '_source': {'publicId': public_id}}
+                for index in header['index'].split(',')
+                for public_id in self.indices.get(index, [])
+                if public_id in wanted
+            ]
+            if 'collapse' in query:
+                seen = set()
+                hits = [
+                    hit for hit in hits
+                    if not (hit['_source']['publicId'] in seen or seen.add(hit['_source']['publicId']))
+                ]
+            responses.append({'hits': {'hits': hits[:query['size']]}})
+        return {'responses': responses}
+
+
+def test_ids_in_several_indices_do_not_hide_others(monkeypatch):
+    fake = FakeProfileClient({
+        'idx_a': ['dup1', 'dup2', 'a', 'b'],
+        'idx_b': ['dup1', 'dup2', 'c', 'd'],
+    })
+    monkeypatch.setattr(settings, 'profiles_index', 'idx_a,idx_b')
+    monkeypatch.setattr(OpenSearchClient, 'async_client', property(lambda self: fake))
+
+    public_ids = ['a', 'b', 'c', 'd', 'dup1', 'dup2']
+    for public_id in public_ids:
+        profile_router.forget(public_id)
+        profile_service.profile_cache.delete(public_id)
+        profile_service.profile_negative_cache.delete(public_id)
+
+    found = asyncio.run(profile_service._fetch_profiles_chunk(public_ids))
+
+    assert sorted(found) == sorted(public_ids)
+    assert not any(profile_service.profile_negative_cache.get(public_id) for public_id in public_ids)
+
+    index, query = fake.queries[0]
+    assert index == 'idx_a,idx_b'
+    assert query['collapse'] == {'field': 'publicId.keyword'}
+
+
+def test_routed_searches_are_not_collapsed():
+    query = profile_service._batch_query(['a', 'b'], ['fullName'])
+
+    assert 'collapse' not in query
+    assert query['size'] == 2
+    assert query['_source'] == {'includes': ['publicId', 'fullName']}
@@ -0,0 +1,70 @@
+"""
+Search response cache: strong ETags over the cached bytes, 304 only from a cache hit
+"""
+
+import itertools
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.services.response_cache import response_etag, etag_matches
+
+REQUEST = {'company_criteria': {'industry': ['Tech']}, 'people_criteria': {}, 'page_size': 10}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    tokens = itertools.count(1)
+    executions = []
+
+    async def execute(**arguments):
+        executions.append(arguments)
+        return {
+            'status': 'success',
+            'results': [{'publicId': 'p1'}],
+            'pagination': {
+                'current_page': 1, 'page_size': 10, 'total_results': 1, 'total_pages': 1,
+                'has_next': False, 'has_previous': False, 'session_token': f'sess_{next(tokens)}'
+            },
+            'metadata': {
+                'companies_matched': 1, 'companies_used': 1, 'company_filter_applied': 1,
+                'profiles_matched': 1, 'query_time_ms': 5, 'search_mode': 'sequential'
+            }
+        }
+
+    monkeypatch.setattr(main.sequential_service, 'execute_sequential_search', execute)
+    main.search_response_cache.clear()
+    yield TestClient(main.app), executions
+    main.search_response_cache.clear()
+
+
+def test_etag_is_strong_digest_of_body():
+    etag = response_etag(b'{"a":1}')
+    assert etag.startswith('"') and etag != response_etag(b'{"a":2}')
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_cache_hit_answers_304(client):
+    client, executions = client
+    first = client.post('/v1/search/sequential', json=REQUEST)
+    etag = first.headers['etag']
+    assert first.status_code == 200 and etag == response_etag(first.content)
+
+    again = client.post('/v1/search/sequential', json=REQUEST, headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.content == b''
+    assert len(executions) == 1
+
+
+def test_expired_page_is_served_in_full(client):
+    client, executions = client
+    first = client.post('/v1/search/sequential', json=REQUEST)
+    main.search_response_cache.clear()
+
+    # Even a wildcard match gets the new page: its session token is new to the client
+    rerun = client.post('/v1/search/sequential', json=REQUEST, headers={'If-None-Match': '*'})
+    assert rerun.status_code == 200
+    assert rerun.json()['pagination']['session_token'] == 'sess_2'
+    assert rerun.headers['etag'] != first.headers['etag']
+    assert len(executions) == 2
@@ -0,0 +1,156 @@
+"""
+Session store tests: Redis backend against a local stand-in client, and
+PIT release when the in-memory store drops a session
+"""
+
+import asyncio
+import pytest
+
+from app.services import session_store as session_store_module
+from app.services.session_store import (
+    InMemorySessionStore,
+    RedisSessionStore,
+    release_session,
+    save_session,
+    _state_size,
+    load_session
+)
+from app.utils.session_token import is_session_ref
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the redis.asyncio client calls the store makes"""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+        self.closed = False
+        self.fail_reads = False
+
+    async def get(self, key):
+        if self.fail_reads:
+            raise ConnectionError("redis down")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.expiry[key] = ex
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def aclose(self):
+        self.closed = True
+
+
+def make_state(session_id, pit=None, names=('Acme', 'Globex')):
+    state = {'sid': session_id, 'cnames': list(names), 'cc': len(names), 'after': {}}
+    if pit:
+        state['pit'] = pit
+    return state
+
+
+@pytest.fixture
+def closed_pits(monkeypatch):
+    closed = []
+
+    async def fake_close_people_pit(pit_id):
+        closed.append(pit_id)
+
+    monkeypatch.setattr(session_store_module, 'close_people_pit', fake_close_people_pit)
+    return closed
+
+
+def test_redis_store_round_trip():
+    client = FakeRedis()
+    store = RedisSessionStore('redis://unused', ttl_seconds=120, client=client)
+
+    async def run():
+        state = make_state('abc', pit='pit-1')
+        await store.put('abc', state)
+        assert await store.get('abc') == state
+        assert await store.get('missing') is None
+        await store.delete('abc')
+        assert await store.get('abc') is None
+        await store.close()
+
+    asyncio.run(run())
+
+    assert client.expiry['seqsess:abc'] == 120
+    assert client.closed
+    assert store.stats()['hits'] == 1
+    assert store.stats()['misses'] == 2
+
+
+def test_redis_store_compresses_and_honours_ttl_override():
+    client = FakeRedis()
+    store = RedisSessionStore('redis://unused', ttl_seconds=120, key_prefix='t:', client=client)
+
+    async def run():
+        await store.put('big', make_state('big', names=[f'Company {i}' for i in range(5000)]), ttl=30)
+
+    asyncio.run(run())
+
+    raw = client.data['t:big']
+    assert isinstance(raw, bytes) and len(raw) < 5000 * 10
+    assert client.expiry['t:big'] == 30
+
+
+def test_redis_store_read_errors_are_misses():
+    client = FakeRedis()
+    client.fail_reads = True
+    store = RedisSessionStore('redis://unused', ttl_seconds=120, client=client)
+
+    assert asyncio.run(store.get('abc')) is None
+    assert store.stats()['errors'] == 1
+
+
+def test_session_refs_resolve_through_redis_store(monkeypatch):
+    store = RedisSessionStore('redis://unused', ttl_seconds=120, client=FakeRedis())
+    monkeypatch.setattr(session_store_module, 'session_store', store)
+
+    async def run():
+        state = make_state('ref-1')
+        token = await save_session(state)
+        assert is_session_ref(token)
+        assert await load_session(token) == state
+
+        await store.delete('ref-1')
+        with pytest.raises(ValueError):
+            await load_session(token)
+
+    asyncio.run(run())
+
+
+def test_memory_store_eviction_closes_pit(closed_pits):
+    budget = int(_state_size(make_state('x')) * 1.5)  # Room for one session only
+
+    async def run():
+        store = InMemorySessionStore(max_bytes=budget, ttl_seconds=60, on_discard=release_session)
+        await store.put('first', make_state('first', pit='pit-1'))
+        await store.put('second', make_state('second', pit='pit-2'))
+        await asyncio.sleep(0)  # Let the scheduled release run
+
+        assert await store.get('first') is None
+        assert await store.get('second') is not None
+
+    asyncio.run(run())
+
+    assert closed_pits == ['pit-1']
+
+
+def test_memory_store_delete_and_resave(closed_pits):
+    async def run():
+        store = InMemorySessionStore(max_bytes=1024 * 1024, ttl_seconds=60, on_discard=release_session)
+        state = make_state('s', pit='pit-9')
+        await store.put('s', state)
+        await store.put('s', state)  # Re-saving a page keeps the PIT open
+        await asyncio.sleep(0)
+        assert closed_pits == []
+
+        await store.delete('s')
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    assert closed_pits == ['pit-9']
@@ -0,0 +1,120 @@
+"""
+Stateless session token tests: v2 (compact binary) round trips, v1 fallback
+and signature / expiry checks
+"""
+
+import time
+import pytest
+
+from app.utils.session_token import (
+    build_session_payload,
+    encode_session_token,
+    decode_session_token,
+    validate_token_matches_criteria,
+    token_company_ids,
+    V2_PREFIX
+)
+
+COMPANY_CRITERIA = {'industry': ['Technology'], 'size': ['51_200']}
+PEOPLE_CRITERIA = {'seniority': ['senior']}
+
+
+def make_payload(names, ids=None, **extras):
+    payload = build_session_payload(
+        names,
+        COMPANY_CRITERIA,
+        PEOPLE_CRITERIA,
+        search_id='sid-1',
+        company_ids=ids
+    )
+    payload.update(extras)
+    return payload
+
+
+def assert_same_session(decoded, payload):
+    # v2 stores companies in id / name order: compare as sets and mappings
+    assert sorted(decoded['cnames']) == sorted(payload['cnames'])
+    assert token_company_ids(decoded) == token_company_ids(payload)
+    for key in ('ch', 'ph', 'iat', 'exp', 'sid'):
+        assert decoded[key] == payload[key]
+
+
+@pytest.mark.parametrize('names, ids', [
+    ([f'Company {i}' for i in range(1000)], {f'Company {i}': 10_000 + 7 * i for i in range(1000)}),
+    ([f'Company {i}' for i in range(1000)], {f'Company {i}': i * 31 for i in range(0, 1000, 3)}),
+    (['Zeta', 'Alpha', 'Ünïcode GmbH', 'Acme, Inc.'], None),
+    ([''], None),
+    ([], None),
+])
+def test_v2_round_trip(names, ids):
+    payload = make_payload(names, ids)
+    token = encode_session_token(payload, version=2)
+
+    assert token.startswith(f"{V2_PREFIX}.")
+    assert_same_session(decode_session_token(token), payload)
+
+
+def test_v2_keeps_extra_session_fields():
+    extras = {'csid': 'cs_abc', 'cc': 42000, 'pt': 1234, 'mode': 'sequential', 'tier': 200,
+              'after': {'11': [1.5, 'john-smith']}, 'pit': 'pit-id'}
+    payload = make_payload(['A', 'B'], {'A': 1}, **extras)
+
+    decoded = decode_session_token(encode_session_token(payload, version=2))
+
+    for key, value in extras.items():
+        assert decoded[key] == value
+
+
+def test_v2_is_smaller_than_v1():
+    names = [f'Company Number {i}' for i in range(10000)]
+    payload = make_payload(names, {name: 1000 + i for i, name in enumerate(names)})
+
+    assert len(encode_session_token(payload, version=2)) < len(encode_session_token(payload, version=1)) / 3
+
+
+def test_v2_token_still_matches_criteria():
+    token = encode_session_token(make_payload(['A']), version=2)
+    decoded = decode_session_token(token)
+
+    assert validate_token_matches_criteria(decoded, COMPANY_CRITERIA, PEOPLE_CRITERIA)
+    assert not validate_token_matches_criteria(decoded, {'industry': ['Finance']}, PEOPLE_CRITERIA)
+
+
+@pytest.mark.parametrize('names, ids', [
+    (['Bad\x00Name'], None),
+    (['A', 'B'], {'A': -5}),
+])
+def test_unencodable_payloads_fall_back_to_v1(names, ids):
+    payload = make_payload(names, ids)
+    token = encode_session_token(payload, version=2)
+
+    assert not token.startswith(f"{V2_PREFIX}.")
+    decoded = decode_session_token(token)
+    assert decoded['cnames'] == names
+    assert token_company_ids(decoded) == token_company_ids(payload)
+
+
+def test_v1_tokens_still_decode():
+    payload = make_payload(['A', 'B'], {'B': 9})
+    decoded = decode_session_token(encode_session_token(payload, version=1))
+
+    assert decoded['cnames'] == ['A', 'B']
+    assert token_company_ids(decoded) == {'B': 9}
+
+
+def test_tampered_v2_token_is_rejected():
+    token = encode_session_token(make_payload(['A', 'B']), version=2)
+    prefix, body, signature = token.split('.')
+    tampered_body = body[:-2] + ('AA' if body[-2:] != 'AA' else 'BB')
+
+    with pytest.raises(ValueError):
+        decode_session_token(f"{prefix}.{tampered_body}.{signature}")
+
+
+def test_expired_v2_token_is_rejected():
+    payload = make_payload(['A'])
+    payload['iat'] = int(time.time()) - 7200
+    payload['exp'] = int(time.time()) - 60
+
+    with pytest.raises(ValueError, match='expired'):
+        decode_session_token(encode_session_token(payload, version=2))